@@ -0,0 +1,84 @@
+# bench_fracarray.py
+#
+# Compare bulk arithmetic on a FractionArray against the same work
+# done on a Python list of Fraction instances (ex7.Fraction and the
+# standard library fractions.Fraction).
+#
+#     shell % python bench_fracarray.py [size]
+
+import fractions
+import random
+import sys
+import time
+
+import ex7
+from fracarray import FractionArray
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+def make_data(size, maxval=1000):
+    rng = random.Random(42)
+    nums = [rng.randint(-maxval, maxval) for _ in range(size)]
+    dens = [rng.randint(1, maxval) for _ in range(size)]
+    return nums, dens
+
+def list_ops(F, a, b):
+    return {
+        'add': lambda: [x + y for x, y in zip(a, b)],
+        'sub': lambda: [x - y for x, y in zip(a, b)],
+        'mul': lambda: [x * y for x, y in zip(a, b)],
+        'div': lambda: [x / y for x, y in zip(a, b)],
+        'sum': lambda: sum(a, F(0)),
+        'prod': lambda: _prod(F, a[:2000]),
+    }
+
+def _prod(F, items):
+    result = F(1)
+    for x in items:
+        result = result * x
+    return result
+
+def array_ops(a, b):
+    return {
+        'add': lambda: a + b,
+        'sub': lambda: a - b,
+        'mul': lambda: a * b,
+        'div': lambda: a / b,
+        'sum': lambda: a.sum(),
+        'prod': lambda: a[:2000].prod(),
+    }
+
+def main(size=100_000):
+    nums, dens = make_data(size)
+    nums2, dens2 = make_data(size, maxval=999)
+    nums2 = [n or 1 for n in nums2]          # Keep the divisor nonzero
+
+    impls = {}
+    for name, F in [('list[ex7.Fraction]', ex7.Fraction), ('list[fractions]', fractions.Fraction)]:
+        a = [F(n, d) for n, d in zip(nums, dens)]
+        b = [F(n, d) for n, d in zip(nums2, dens2)]
+        impls[name] = list_ops(F, a, b)
+    impls['FractionArray'] = array_ops(FractionArray(nums, dens), FractionArray(nums2, dens2))
+
+    print(f'{size} elements (prod over the first 2000)')
+    print(f'{"op":<6}' + ''.join(f'{name:>22}' for name in impls))
+    for op in ['add', 'sub', 'mul', 'div', 'sum', 'prod']:
+        results = []
+        row = f'{op:<6}'
+        for ops in impls.values():
+            result, elapsed = timed(ops[op])
+            results.append(result)
+            row += f'{elapsed * 1e3:>19.2f} ms'
+        # All implementations must agree
+        expected = results[0]
+        if isinstance(expected, list):
+            assert all(list(r) == expected for r in results[1:])
+        else:
+            assert all(r == expected for r in results[1:])
+        print(row)
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,51 @@
+# bench_fraccache.py
+#
+# Measure the legacy fraction API in ex7.py with and without a
+# FractionCache on a workload dominated by small fractions.  Reports
+# time, the number of distinct Fraction objects alive at the end, and
+# the cache hit rates for a few table sizes.
+#
+#     shell % python bench_fraccache.py [operations]
+
+import random
+import sys
+import time
+
+import ex7
+from fraccache import FractionCache
+
+def workload(api, count, seed=42):
+    # Random adds/multiplies of fractions with small terms.  Every
+    # result is kept so that the number of live objects can be counted.
+    rng = random.Random(seed)
+    results = []
+    for _ in range(count):
+        a = api.make_frac(rng.randint(1, 12), rng.randint(1, 12))
+        b = api.make_frac(rng.randint(1, 12), rng.randint(1, 12))
+        if rng.random() < 0.5:
+            results.append(api.add_frac(a, b))
+        else:
+            results.append(api.mul_frac(a, b))
+    return results
+
+def report(label, api, count):
+    start = time.perf_counter()
+    results = workload(api, count)
+    elapsed = time.perf_counter() - start
+    distinct = len({id(r) for r in results})
+    print(f'{label:<28} {elapsed * 1e9 / count:>10.0f} ns/iter {distinct:>10} objects', end='')
+
+def main(count=200_000):
+    print(f'{count} iterations of make_frac() x 2 + add_frac()/mul_frac()')
+    report('ex7 (no cache)', ex7, count)
+    print()
+    for limit, maxsize, opsize in [(16, 64, 64), (256, 1024, 1024), (256, 4096, 16384)]:
+        cache = FractionCache(limit=limit, maxsize=maxsize, opsize=opsize)
+        report(f'cache {limit}/{maxsize}/{opsize}', cache, count)
+        s = cache.stats()
+        intern_rate = s['hits'] / max(1, s['hits'] + s['misses'])
+        op_rate = s['op_hits'] / max(1, s['op_hits'] + s['op_misses'])
+        print(f'  intern hit {intern_rate:6.1%}  op hit {op_rate:6.1%}')
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,72 @@
+# bench_fracmatrix.py
+#
+# Solve Hilbert systems H x = b exactly with FractionMatrix (Bareiss
+# elimination) and with naive Gaussian elimination on Fractions (both
+# ex7.Fraction and fractions.Fraction).  Also reports the size of the
+# largest intermediate number, in bits, seen by each method.
+#
+#     shell % python bench_fracmatrix.py [maxn]
+
+import fractions
+import sys
+import time
+
+import ex7
+from fracmatrix import FractionMatrix
+
+def naive_solve(rows, b, F):
+    # Textbook Gaussian elimination with back substitution.  Returns
+    # the solution and the largest numerator/denominator (in bits).
+    n = len(rows)
+    m = [[F(x.numerator, x.denominator) for x in row] + [F(v)] for row, v in zip(rows, b)]
+    biggest = 0
+    for k in range(n):
+        pivot = next(i for i in range(k, n) if m[i][k] != 0)
+        m[k], m[pivot] = m[pivot], m[k]
+        for i in range(k + 1, n):
+            f = m[i][k] / m[k][k]
+            m[i] = [x - f * y for x, y in zip(m[i], m[k])]
+            biggest = max(biggest, max(max(abs(x.numerator).bit_length(),
+                                           x.denominator.bit_length()) for x in m[i]))
+    x = [F(0)] * n
+    for i in reversed(range(n)):
+        total = m[i][n] - sum((m[i][j] * x[j] for j in range(i + 1, n)), F(0))
+        x[i] = total / m[i][i]
+    return x, biggest
+
+def bareiss_bits(rows):
+    # Re-run the integer elimination to find the largest entry
+    from fracmatrix import _integer_row, _bareiss
+    n = len(rows)
+    m = [_integer_row(row)[1] for row in rows]
+    _bareiss(m, n)
+    return max(abs(x).bit_length() for row in m for x in row)
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+def main(maxn=50):
+    print(f'{"n":>3} {"Bareiss (s)":>12} {"naive ex7 (s)":>14} {"naive fractions (s)":>20}'
+          f' {"Bareiss bits":>13} {"naive bits":>11}')
+    for n in [5, 10, 20, 30, 40, 50]:
+        if n > maxn:
+            break
+        h = FractionMatrix.hilbert(n)
+        b = [1] * n
+        x, bt = timed(h.solve, b)
+        (x1, nbits), t1 = timed(naive_solve, h.rows, b, ex7.Fraction)
+        (x2, _), t2 = timed(naive_solve, h.rows, b, fractions.Fraction)
+        assert x == x1 == [ex7.Fraction(v.numerator, v.denominator) for v in x2]
+        print(f'{n:>3} {bt:>12.4f} {t1:>14.4f} {t2:>20.4f} {bareiss_bits(h.rows):>13} {nbits:>11}')
+
+    n = min(maxn, 50)
+    h = FractionMatrix.hilbert(n)
+    _, t = timed(h.determinant)
+    print(f'\ndeterminant(H{n}) {t:.4f} s')
+    _, t = timed(h.inverse)
+    print(f'inverse(H{n})     {t:.4f} s')
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,72 @@
+# bench_fraction.py
+#
+# Microbenchmark of the Fraction class in ex7.py against the standard
+# library fractions.Fraction.  Reports the time per operation (ns/op)
+# and the memory used by a single instance (bytes).
+#
+#     shell % python bench_fraction.py
+#
+# Timings are the best of several repeats to reduce noise.
+
+import fractions
+import sys
+import timeit
+import tracemalloc
+
+import ex7
+
+REPEAT = 5
+NUMBER = 200_000
+
+def time_op(stmt, setup_globals):
+    timer = timeit.Timer(stmt, globals=setup_globals)
+    best = min(timer.repeat(repeat=REPEAT, number=NUMBER))
+    return best / NUMBER * 1e9
+
+def bytes_per_instance(cls, count=100_000):
+    # Measure the allocation of many live instances so that any
+    # per-instance __dict__ or cached values are included.  The int
+    # objects for numerator/denominator are counted too, but they are
+    # the same for every implementation.
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    items = [cls(n, n + 1) for n in range(1, count + 1)]
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return (after - before - sys.getsizeof(items)) / count, sys.getsizeof(items[0])
+
+OPERATIONS = [
+    ('construct', 'F(4, 6)'),
+    ('add', 'a + b'),
+    ('sub', 'a - b'),
+    ('mul', 'a * b'),
+    ('div', 'a / b'),
+    ('add int', 'a + 1'),
+    ('compare', 'a < b'),
+    ('equal', 'a == c'),
+    ('hash', 'hash(a)'),
+]
+
+def main():
+    impls = [('ex7.Fraction', ex7.Fraction), ('fractions.Fraction', fractions.Fraction)]
+    print(f'{"operation":<12}' + ''.join(f'{name:>22}' for name, _ in impls))
+    for label, stmt in OPERATIONS:
+        row = f'{label:<12}'
+        for _, F in impls:
+            env = {'F': F, 'a': F(2, 3), 'b': F(-3, 4), 'c': F(4, 6)}
+            row += f'{time_op(stmt, env):>18.1f} ns'
+        print(row)
+
+    print()
+    print(f'{"memory":<12}' + ''.join(f'{name:>22}' for name, _ in impls))
+    traced = []
+    shallow = []
+    for _, F in impls:
+        t, s = bytes_per_instance(F)
+        traced.append(t)
+        shallow.append(s)
+    print(f'{"traced":<12}' + ''.join(f'{t:>15.1f} bytes' for t in traced))
+    print(f'{"getsizeof":<12}' + ''.join(f'{s:>15d} bytes' for s in shallow))
+
+if __name__ == '__main__':
+    main()
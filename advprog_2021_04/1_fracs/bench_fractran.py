@@ -0,0 +1,61 @@
+# bench_fractran.py
+#
+# Compare the Fractran engines in ex8.py on the fibonacci program for
+# n = 1 .. 30.  The original run() multiplies big integers and gets
+# very slow quickly, so it is skipped once a single call takes longer
+# than LEGACY_BUDGET seconds.  The vector engine gets the same budget.
+# A second table shows the accelerated engine on much larger n along
+# with how many logical steps were folded into each macro-step.
+#
+#     shell % python bench_fractran.py [maxn]
+
+import sys
+import time
+
+import ex8
+
+LEGACY_BUDGET = 5.0
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+def main(maxn=30):
+    print(f'{"n":>3} {"fib(n)":>10} {"run (s)":>12} {"run_vector (s)":>15} {"accelerated (s)":>16}')
+    legacy = vector = True
+    for n in range(1, maxn + 1):
+        fib, atime = timed(ex8.fibonacci_accelerated, n)
+        row = f'{n:>3} {fib:>10}'
+        if legacy:
+            expected, ltime = timed(ex8.fibonacci, n)
+            assert expected == fib
+            legacy = ltime < LEGACY_BUDGET
+            row += f' {ltime:>12.4f}'
+        else:
+            row += f' {"-":>12}'
+        if vector:
+            expected, vtime = timed(ex8.fibonacci_vector, n)
+            assert expected == fib
+            vector = vtime < LEGACY_BUDGET
+            row += f' {vtime:>15.4f}'
+        else:
+            row += f' {"-":>15}'
+        print(row + f' {atime:>16.4f}')
+
+    print()
+    print(f'{"n":>4} {"time (s)":>10} {"macro-steps":>12} {"logical steps":>16} {"steps/macro-step":>18}')
+    for n in (50, 100, 200, 300, 500):
+        stats = ex8.FractranStats()
+        _, atime = timed(ex8.fibonacci_accelerated, n, stats)
+        print(f'{n:>4} {atime:>10.4f} {stats.macro_steps:>12} {stats.steps:>16.3e} '
+              f'{stats.steps / stats.macro_steps:>18.3e}')
+
+    print()
+    print('Folded loops for n=500:')
+    for loop, (count, steps) in sorted(stats.folded.items(), key=lambda item: -item[1][1]):
+        fracs = ' '.join(f'{ex8.fibcode[r].numerator}/{ex8.fibcode[r].denominator}' for r in loop)
+        print(f'  {fracs:<16} {count:>6} macro-steps  {steps:.3e} logical steps')
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -16,6 +16,8 @@
 #
 # See if your fraction implementation can run Fractran
 
+from collections import deque
+
 from ex7 import Fraction
 
 # The evaluator
@@ -54,6 +56,252 @@ def fibonacci(n):
     result = run(fibcode, 78 * 5**(n - 1))
     return math.log2(int(result))
 
-# Try it out
-for n in range(1, 16):
-    print(fibonacci(n))
+# -----------------------------------------------------------------------------
+# A faster engine: prime-exponent vectors
+#
+# The evaluator above multiplies an ever-growing integer n by every
+# fraction in turn.  However, every number involved is really just a
+# product of a few primes.  If the program is factored once up front,
+# n can be kept as a vector of prime exponents instead.  Then:
+#
+#   - "Is n*f an integer?" becomes "does n have at least as many of each
+#     prime as the denominator of f?"  (f is in lowest terms).
+#   - n = n*f becomes adding the exponents of f to the vector.
+#
+# Primes of n that never appear in the program can't affect which
+# fraction fires, so they're carried along untouched as a cofactor.
+
+def _factor(n, primes):
+    # Factor n over the given primes.  Returns (exponents, cofactor)
+    exponents = []
+    for p in primes:
+        e = 0
+        while n % p == 0:
+            n //= p
+            e += 1
+        exponents.append(e)
+    return exponents, n
+
+def _prime_factors(n):
+    # Distinct prime factors of a (small) positive integer by trial division
+    factors = []
+    p = 2
+    while p * p <= n:
+        if n % p == 0:
+            factors.append(p)
+            while n % p == 0:
+                n //= p
+        p += 1
+    if n > 1:
+        factors.append(n)
+    return factors
+
+def compile_program(prog):
+    # Factor the program once.  Returns (primes, rules) where each rule
+    # is a pair (need, delta).  need is a tuple of (index, exponent)
+    # for the primes in the denominator and delta is a tuple of
+    # (index, change) for every prime whose exponent changes when the
+    # rule fires.
+    primes = sorted({p for f in prog
+                       for p in _prime_factors(f.numerator) + _prime_factors(f.denominator)})
+    rules = []
+    for f in prog:
+        num, _ = _factor(f.numerator, primes)
+        den, _ = _factor(f.denominator, primes)
+        need = tuple((i, e) for i, e in enumerate(den) if e)
+        delta = tuple((i, num[i] - den[i]) for i in range(len(primes)) if num[i] != den[i])
+        rules.append((need, delta))
+    return primes, rules
+
+def run_exponents(prog, n):
+    # Run prog starting at n.  Returns (primes, exponents, cofactor)
+    # describing the final value without ever building it.
+    primes, rules = compile_program(prog)
+    v, cofactor = _factor(n, primes)
+    while True:
+        for need, delta in rules:
+            for i, e in need:
+                if v[i] < e:
+                    break
+            else:
+                for i, d in delta:
+                    v[i] += d
+                break
+        else:
+            return primes, v, cofactor
+
+def run_vector(prog, n):
+    # Same result as run(), computed with prime-exponent vectors
+    primes, v, result = run_exponents(prog, n)
+    for p, e in zip(primes, v):
+        result *= p ** e
+    return result
+
+def fibonacci_vector(n):
+    # The result of fibcode is 2**fib(n).  With the exponent vector,
+    # the answer can be read off directly instead of taking a log.
+    primes, v, cofactor = run_exponents(fibcode, 78 * 5**(n - 1))
+    return v[primes.index(2)]
+
+def test_run_vector():
+    for n in range(1, 12):
+        start = 78 * 5**(n - 1)
+        assert run_vector(fibcode, start) == run(fibcode, start)
+        assert fibonacci_vector(n) == fibonacci(n)
+
+    # A start value with primes that the program never touches
+    assert run_vector(fibcode, 78 * 5 * 47**2) == run(fibcode, 78 * 5 * 47**2)
+    print('Good vector engine')
+
+# -----------------------------------------------------------------------------
+# Accelerated engine: folding loops into macro-steps
+#
+# Most of the steps of a program like fibcode are spent in tight loops
+# where one fraction (or a pair of fractions) fires over and over,
+# moving exponents from one prime to another.  With the exponent
+# vector representation, repeating a loop t times just adds t times
+# the loop's combined delta.  As t grows, each exponent changes
+# linearly, so for every rule the set of t at which it is applicable
+# is an interval.  That makes it possible to work out exactly how many
+# times the loop keeps going before some other rule takes over, and
+# then apply all of those iterations as a single macro-step.
+
+class FractranStats:
+    def __init__(self):
+        self.steps = 0            # Logical Fractran steps (fractions fired)
+        self.macro_steps = 0      # Dispatches (single steps + folded loops)
+        self.folded = {}          # loop (rule indices) -> [macro-steps, logical steps]
+
+    def record(self, loop, count):
+        steps = count * len(loop)
+        self.steps += steps
+        self.macro_steps += 1
+        if count > 1:
+            entry = self.folded.setdefault(loop, [0, 0])
+            entry[0] += 1
+            entry[1] += steps
+
+    def __repr__(self):
+        return f'FractranStats(steps={self.steps}, macro_steps={self.macro_steps})'
+
+def _applicable_interval(need, state, step):
+    # Range (lo, hi) of t >= 0 for which a rule with the given need is
+    # applicable at state + t*step.  hi is None if unbounded. Returns
+    # None if the rule is never applicable.
+    lo, hi = 0, None
+    for i, e in need:
+        v, d = state[i], step[i]
+        if d > 0:
+            if v < e:
+                lo = max(lo, -((v - e) // d))      # ceil((e - v) / d)
+        elif v < e:
+            return None
+        elif d < 0:
+            t = (v - e) // -d
+            hi = t if hi is None else min(hi, t)
+    if hi is not None and lo > hi:
+        return None
+    return lo, hi
+
+def _loop_count(rules, dense, loop, v):
+    # Number of complete times that the given loop of rules runs in
+    # sequence starting from v.  Returns 0 if the loop doesn't start here.
+    step = [sum(col) for col in zip(*(dense[r] for r in loop))]
+    count = None
+    state = v
+    for r in loop:
+        # The loop rule itself must stay applicable
+        interval = _applicable_interval(rules[r][0], state, step)
+        if interval is None or interval[0] > 0:
+            return 0
+        if interval[1] is not None:
+            limit = interval[1] + 1
+            count = limit if count is None else min(count, limit)
+        # Every rule ahead of it must stay inapplicable
+        for j in range(r):
+            interval = _applicable_interval(rules[j][0], state, step)
+            if interval is not None:
+                if interval[0] == 0:
+                    return 0
+                count = interval[0] if count is None else min(count, interval[0])
+        state = [x + d for x, d in zip(state, dense[r])]
+    if count is None:
+        raise RuntimeError(f'Fractran program loops forever on rules {loop}')
+    return count
+
+def _first_applicable(rules, v):
+    for r, (need, _) in enumerate(rules):
+        for i, e in need:
+            if v[i] < e:
+                break
+        else:
+            return r
+    return None
+
+def run_accelerated_exponents(prog, n, max_loop=2, stats=None):
+    # Like run_exponents(), but folds repeated loops of up to max_loop
+    # rules into single macro-steps.  Progress is recorded in stats
+    # (a FractranStats instance) if one is given.
+    primes, rules = compile_program(prog)
+    dense = []
+    for _, delta in rules:
+        vec = [0] * len(primes)
+        for i, d in delta:
+            vec[i] = d
+        dense.append(vec)
+    if stats is None:
+        stats = FractranStats()
+    v, cofactor = _factor(n, primes)
+    history = deque(maxlen=max_loop)
+    while True:
+        r = _first_applicable(rules, v)
+        if r is None:
+            return primes, v, cofactor
+        # Candidate loops: r on its own, or r followed by the rules that
+        # fired after the last time that r fired.
+        for size in range(1, max_loop + 1):
+            if size > 1 and (len(history) < size or history[-size] != r):
+                continue
+            loop = (r,) + tuple(history)[len(history) - size + 1:]
+            count = _loop_count(rules, dense, loop, v)
+            if count * size > 1:
+                for rule in loop:
+                    for i, d in rules[rule][1]:
+                        v[i] += count * d
+                stats.record(loop, count)
+                history.extend(loop)
+                break
+        else:
+            for i, d in rules[r][1]:
+                v[i] += d
+            stats.record((r,), 1)
+            history.append(r)
+
+def run_accelerated(prog, n, max_loop=2, stats=None):
+    # Same result as run(), using folded macro-steps
+    primes, v, result = run_accelerated_exponents(prog, n, max_loop, stats)
+    for p, e in zip(primes, v):
+        result *= p ** e
+    return result
+
+def fibonacci_accelerated(n, stats=None):
+    primes, v, cofactor = run_accelerated_exponents(fibcode, 78 * 5**(n - 1), stats=stats)
+    return v[primes.index(2)]
+
+def test_run_accelerated():
+    for n in range(1, 12):
+        start = 78 * 5**(n - 1)
+        assert run_accelerated(fibcode, start) == run(fibcode, start)
+
+    stats = FractranStats()
+    assert fibonacci_accelerated(25, stats) == fibonacci_vector(25)
+    assert stats.macro_steps < stats.steps
+    print('Good accelerated engine')
+
+if __name__ == '__main__':
+    # Try it out
+    for n in range(1, 16):
+        print(fibonacci(n))
+
+    test_run_vector()
+    test_run_accelerated()
@@ -0,0 +1,274 @@
+# fracarray.py
+#
+# Bulk rational arithmetic.
+#
+# The Fraction class in ex7.py (and the tuple/NamedTuple versions in
+# earlier exercises) work with one fraction at a time.  When you have
+# long columns of rationals to add or multiply, all of that per-object
+# overhead adds up.  A FractionArray stores a whole column as two
+# parallel integer arrays--numerators and denominators--and performs
+# every operation on the whole column at once with NumPy.
+#
+#    >>> a = FractionArray([1, 2, 3], [2, 3, 4])
+#    >>> b = FractionArray([1, 1, 1], [2, 3, 4])
+#    >>> a + b
+#    FractionArray([1, 1, 1], [1, 1, 1])
+#    >>> (a * b).sum()
+#    Fraction(95, 144)
+#    >>>
+#
+# The arrays are int64 when possible.  Before each operation, the
+# largest possible result is worked out from the largest magnitudes of
+# the inputs.  If it might not fit in 64 bits, the operation is
+# carried out with dtype=object (Python integers) instead, so results
+# are always exact.  Arrays that shrink back into range after
+# normalization are switched back to int64.
+
+import math
+
+import numpy as np
+
+from ex7 import Fraction
+
+INT64_MAX = 2**63 - 1
+
+def _magnitude(a):
+    # Largest absolute value in an array as a Python int
+    if a.size == 0:
+        return 0
+    return max(int(a.max()), -int(a.min()))
+
+def _promote(bound, *arrays):
+    # Return the arrays in a dtype that can hold values up to bound
+    if bound <= INT64_MAX and all(a.dtype != object for a in arrays):
+        return arrays
+    return tuple(a.astype(object) for a in arrays)
+
+def _as_int(x):
+    # Integral values only.  2.0 is fine, 0.5 would be truncated.
+    n = int(x)
+    if n != x:
+        raise TypeError(f'FractionArray needs integers, not {x!r}')
+    return n
+
+def _as_int_array(values):
+    a = np.asarray(values)
+    if a.dtype == object or a.dtype.kind not in 'iu':
+        a = np.asarray([_as_int(x) for x in a.ravel()], dtype=object).reshape(a.shape)
+        return a.astype(np.int64) if _magnitude(a) <= INT64_MAX else a
+    if _magnitude(a) > INT64_MAX:
+        return a.astype(object)
+    return a.astype(np.int64, copy=False)
+
+def _normalize(num, den):
+    # Put every element into lowest terms with a positive denominator
+    if np.any(den == 0):
+        raise ZeroDivisionError('FractionArray with a zero denominator')
+    sign = np.where(den < 0, -1, 1)
+    g = np.gcd(num, den) * sign
+    num = num // g
+    den = den // g
+    if num.dtype == object and max(_magnitude(num), _magnitude(den)) <= INT64_MAX:
+        num = num.astype(np.int64)
+        den = den.astype(np.int64)
+    return num, den
+
+def _tree_product(a):
+    # Product of all elements, multiplying pairs so that operands stay
+    # balanced (and vectorized) instead of growing one at a time
+    if a.size == 0:
+        return 1
+    while a.size > 1:
+        if a.size % 2:
+            a = np.append(a, np.ones(1, dtype=a.dtype))
+        left, right = a[0::2], a[1::2]
+        left, right = _promote(_magnitude(left) * _magnitude(right), left, right)
+        a = left * right
+    return int(a[0])
+
+class FractionArray:
+    def __init__(self, numerators, denominators=None):
+        num = _as_int_array(numerators)
+        den = np.ones_like(num) if denominators is None else _as_int_array(denominators)
+        if num.shape != den.shape or num.ndim != 1:
+            raise ValueError('numerators and denominators must be 1-d and the same length')
+        num, den = _promote(0, num, den)
+        self.numerators, self.denominators = _normalize(num, den)
+
+    @classmethod
+    def _from_normalized(cls, num, den):
+        self = cls.__new__(cls)
+        self.numerators = num
+        self.denominators = den
+        return self
+
+    @classmethod
+    def from_fractions(cls, fractions):
+        fractions = list(fractions)
+        return cls([f.numerator for f in fractions], [f.denominator for f in fractions])
+
+    def __len__(self):
+        return len(self.numerators)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return FractionArray._from_normalized(self.numerators[index], self.denominators[index])
+        return Fraction(int(self.numerators[index]), int(self.denominators[index]))
+
+    def __iter__(self):
+        return map(Fraction, self.numerators.tolist(), self.denominators.tolist())
+
+    def __repr__(self):
+        return f'FractionArray({self.numerators.tolist()}, {self.denominators.tolist()})'
+
+    def __eq__(self, other):
+        if not isinstance(other, FractionArray):
+            return NotImplemented
+        return (len(self) == len(other) and
+                bool(np.all(self.numerators == other.numerators)) and
+                bool(np.all(self.denominators == other.denominators)))
+
+    __hash__ = None
+
+    def _parts(self, other):
+        # Numerator/denominator arrays for the other operand of an
+        # elementwise operation. Scalars broadcast over the whole array.
+        if isinstance(other, FractionArray):
+            if len(other) != len(self):
+                raise ValueError(f'length mismatch: {len(self)} != {len(other)}')
+            return other.numerators, other.denominators
+        try:
+            on, od = other.numerator, other.denominator
+        except AttributeError:
+            return None
+        return _as_int_array([on]), _as_int_array([od])
+
+    def _cross(self, on, od, sign):
+        # n1/d1 +/- n2/d2 = (n1*d2 +/- n2*d1) / (d1*d2)
+        n1, d1 = self.numerators, self.denominators
+        mn1, md1, mn2, md2 = map(_magnitude, (n1, d1, on, od))
+        n1, d1, on, od = _promote(max(mn1 * md2 + mn2 * md1, md1 * md2), n1, d1, on, od)
+        num = n1 * od + on * d1 if sign > 0 else n1 * od - on * d1
+        return FractionArray._from_normalized(*_normalize(num, d1 * od))
+
+    def __add__(self, other):
+        parts = self._parts(other)
+        if parts is None:
+            return NotImplemented
+        return self._cross(*parts, 1)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        parts = self._parts(other)
+        if parts is None:
+            return NotImplemented
+        return self._cross(*parts, -1)
+
+    def __rsub__(self, other):
+        return -self + other
+
+    def __neg__(self):
+        return FractionArray._from_normalized(-self.numerators, self.denominators.copy())
+
+    def _times(self, on, od):
+        n1, d1 = self.numerators, self.denominators
+        mn1, md1, mn2, md2 = map(_magnitude, (n1, d1, on, od))
+        n1, d1, on, od = _promote(max(mn1 * mn2, md1 * md2), n1, d1, on, od)
+        return FractionArray._from_normalized(*_normalize(n1 * on, d1 * od))
+
+    def __mul__(self, other):
+        parts = self._parts(other)
+        if parts is None:
+            return NotImplemented
+        return self._times(*parts)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        parts = self._parts(other)
+        if parts is None:
+            return NotImplemented
+        on, od = parts
+        return self._times(od, on)
+
+    def __rtruediv__(self, other):
+        parts = self._parts(other)
+        if parts is None:
+            return NotImplemented
+        on, od = parts
+        return FractionArray._from_normalized(self.denominators, self.numerators)._times(on, od)
+
+    def sum(self):
+        # Elements are grouped by denominator so that all numerators
+        # sharing a denominator are added in one vectorized step.  The
+        # groups are then combined with a running common denominator.
+        if len(self) == 0:
+            return Fraction(0)
+        order = np.argsort(self.denominators, kind='stable')
+        num = self.numerators[order]
+        den = self.denominators[order]
+        starts = np.flatnonzero(np.r_[True, den[1:] != den[:-1]])
+        num, = _promote(_magnitude(num) * len(num), num)
+        sums = np.add.reduceat(num, starts)
+        total_n, total_d = 0, 1
+        for n, d in zip(sums.tolist(), den[starts].tolist()):
+            common = total_d * d // math.gcd(total_d, d)
+            total_n = total_n * (common // total_d) + n * (common // d)
+            total_d = common
+        return Fraction(total_n, total_d)
+
+    def prod(self):
+        return Fraction(_tree_product(self.numerators), _tree_product(self.denominators))
+
+    def to_fractions(self):
+        return list(self)
+
+def test_fraction_array():
+    a = FractionArray([4, -3, 3], [6, -4, -4])
+    assert a.numerators.tolist() == [2, 3, -3]
+    assert a.denominators.tolist() == [3, 4, 4]
+    assert a[0] == Fraction(2, 3)
+    assert list(a[1:]) == [Fraction(3, 4), Fraction(-3, 4)]
+
+    b = FractionArray([1, 1, 1], [2, 3, 4])
+    assert list(a + b) == [x + y for x, y in zip(a, b)]
+    assert list(a - b) == [x - y for x, y in zip(a, b)]
+    assert list(a * b) == [x * y for x, y in zip(a, b)]
+    assert list(a / b) == [x / y for x, y in zip(a, b)]
+    assert list(a + 1) == [x + 1 for x in a]
+    assert list(1 - a) == [1 - x for x in a]
+    assert list(2 / a) == [2 / x for x in a]
+    assert a.sum() == Fraction(2, 3)
+    assert a.prod() == Fraction(-3, 8)
+
+    # Values that don't fit into int64 switch to exact Python integers
+    big = FractionArray([2**62, 3], [3, 2**62 + 1])
+    assert big.numerators.dtype == np.int64
+    c = big * big
+    assert c.numerators.dtype == object
+    assert list(c) == [x * x for x in big]
+    assert (big + big).sum() == 2 * (Fraction(2**62, 3) + Fraction(3, 2**62 + 1))
+
+    # ... and back again once they shrink
+    d = c / c
+    assert d.numerators.dtype == np.int64
+    assert list(d) == [Fraction(1), Fraction(1)]
+
+    try:
+        a / FractionArray([0, 1, 1])
+        assert False, "Expected ZeroDivisionError"
+    except ZeroDivisionError:
+        pass
+
+    # Floats are only accepted if they are whole numbers
+    assert list(FractionArray([2.0], [4.0])) == [Fraction(1, 2)]
+    try:
+        FractionArray([0.5], [1])
+        assert False, "Expected TypeError"
+    except TypeError:
+        pass
+    print('Good fraction arrays')
+
+if __name__ == '__main__':
+    test_fraction_array()
@@ -0,0 +1,192 @@
+# fraccache.py
+#
+# Opt-in interning for the legacy fraction API of ex7.py.
+#
+# Programs that use make_frac(), add_frac(), mul_frac() and friends
+# tend to create the same handful of small fractions (1/2, 2/3, 3/4,
+# ...) over and over again.  Since Fraction instances are immutable,
+# there's no reason to have more than one of each.  A FractionCache
+# provides the same functions as ex7.py, but hands out a single
+# canonical instance for every small fraction and remembers the
+# results of recently used operations.
+#
+#    >>> cache = FractionCache(limit=100)
+#    >>> a = cache.make_frac(1, 2)
+#    >>> cache.make_frac(2, 4) is a
+#    True
+#    >>> cache.add_frac(a, a)
+#    Fraction(1, 1)
+#    >>> cache.stats()
+#    {'hits': 1, 'misses': 2, 'evictions': 0, 'size': 2, 'op_hits': 0, ...}
+#
+# Only fractions whose numerator and denominator (in lowest terms) are
+# both under `limit` (in absolute value) are interned.  The interning
+# table and the operation cache are both bounded.  Once full, the least
+# recently used entry is evicted.  The hit/miss counters are there to
+# help tune the sizes for a given workload.
+#
+# Interning saves memory, not time.  Every call pays for a gcd, a dict
+# lookup and the LRU bookkeeping, which costs more than building a new
+# ex7 Fraction.  bench_fraccache.py (200000 random adds/multiplies of
+# fractions with terms up to 12) gives
+#
+#    ex7 (no cache)            5.4 us/iter   200000 objects
+#    cache 16/64/64            8.5 us/iter   162678 objects   op hit  1%
+#    cache 256/1024/1024       7.8 us/iter    40259 objects   op hit 17%
+#    cache 256/4096/16384      7.0 us/iter     2954 objects   op hit 92%
+#
+# With tables too small for the working set, the cache is slower and
+# saves little.  Even when nearly every operation hits, it is about 30%
+# slower than ex7.  What it buys is 70x fewer live objects.  Use a
+# FractionCache when a program keeps many results alive and they repeat
+# a lot (big tables or matrices of small fractions).  Size the tables
+# from stats() so that the hit rates are high.  Don't use it to make
+# arithmetic faster.
+
+import math
+from collections import OrderedDict
+
+from ex7 import Fraction, numerator, denominator
+
+class FractionCache:
+    def __init__(self, limit=256, maxsize=4096, opsize=4096):
+        self.limit = limit
+        self.maxsize = maxsize
+        self.opsize = opsize
+        self._table = OrderedDict()      # (numer, denom) -> Fraction
+        self._ops = OrderedDict()        # (op, a, b) -> Fraction
+        self.clear()
+
+    def clear(self):
+        self._table.clear()
+        self._ops.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.op_hits = 0
+        self.op_misses = 0
+        self.op_evictions = 0
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self._table),
+            'op_hits': self.op_hits,
+            'op_misses': self.op_misses,
+            'op_evictions': self.op_evictions,
+            'op_size': len(self._ops),
+        }
+
+    def make_frac(self, numer, denom):
+        # Put the key in lowest terms so that (2, 4) and (1, 2) share
+        # one canonical instance.  The limit applies to the reduced
+        # fraction, so (300, 600) is interned too.
+        d = math.gcd(numer, denom)
+        if denom < 0:
+            d = -d
+        key = (numer // d, denom // d) if d else (numer, denom)
+        if not (-self.limit < key[0] < self.limit and -self.limit < key[1] < self.limit):
+            return Fraction(numer, denom)
+        table = self._table
+        frac = table.get(key)
+        if frac is not None:
+            self.hits += 1
+            table.move_to_end(key)
+            return frac
+        self.misses += 1
+        frac = table[key] = Fraction(numer, denom)
+        if len(table) > self.maxsize:
+            table.popitem(last=False)
+            self.evictions += 1
+        return frac
+
+    def _memoize(self, op, a, b, compute):
+        ops = self._ops
+        key = (op, a, b)
+        result = ops.get(key)
+        if result is not None:
+            self.op_hits += 1
+            ops.move_to_end(key)
+            return result
+        self.op_misses += 1
+        result = ops[key] = compute(a, b)
+        if len(ops) > self.opsize:
+            ops.popitem(last=False)
+            self.op_evictions += 1
+        return result
+
+    def _add(self, a, b):
+        return self.make_frac(
+            numerator(a)*denominator(b) + denominator(a)*numerator(b),
+            denominator(a)*denominator(b)
+        )
+
+    def _sub(self, a, b):
+        return self.make_frac(
+            numerator(a)*denominator(b) - denominator(a)*numerator(b),
+            denominator(a)*denominator(b)
+        )
+
+    def _mul(self, a, b):
+        return self.make_frac(
+            numerator(a)*numerator(b),
+            denominator(a)*denominator(b)
+        )
+
+    def _div(self, a, b):
+        return self.make_frac(
+            numerator(a)*denominator(b),
+            denominator(a)*numerator(b)
+        )
+
+    def add_frac(self, a, b):
+        return self._memoize('add', a, b, self._add)
+
+    def sub_frac(self, a, b):
+        return self._memoize('sub', a, b, self._sub)
+
+    def mul_frac(self, a, b):
+        return self._memoize('mul', a, b, self._mul)
+
+    def div_frac(self, a, b):
+        return self._memoize('div', a, b, self._div)
+
+def test_cache():
+    cache = FractionCache(limit=100, maxsize=16, opsize=2)
+
+    # The same legacy tests as ex7.py
+    a = cache.make_frac(4, 6)
+    assert (numerator(a), denominator(a)) == (2, 3)
+    b = cache.make_frac(-3, -4)
+    assert (numerator(b), denominator(b)) == (3, 4)
+    c = cache.make_frac(3, -4)
+    assert (numerator(c), denominator(c)) == (-3, 4)
+    assert cache.add_frac(a, b) == Fraction(17, 12)
+    assert cache.sub_frac(a, b) == Fraction(-1, 12)
+    assert cache.mul_frac(a, b) == Fraction(1, 2)
+    assert cache.div_frac(a, b) == Fraction(8, 9)
+
+    # Interning
+    assert cache.make_frac(2, 3) is a
+    assert cache.make_frac(8, 12) is a
+    assert cache.make_frac(300, 450) is a           # Reduces to within the limit
+    assert cache.make_frac(1000, 3) is not cache.make_frac(1000, 3)
+
+    # Operation cache
+    hits, misses = cache.op_hits, cache.op_misses
+    assert cache.mul_frac(b, c) is cache.mul_frac(b, c)
+    assert (cache.op_hits, cache.op_misses) == (hits + 1, misses + 1)
+
+    # Both tables are bounded
+    for n in range(1, 50):
+        cache.make_frac(n, 97)
+        cache.add_frac(cache.make_frac(1, n), a)
+    stats = cache.stats()
+    assert stats['size'] <= 16 and stats['evictions'] > 0
+    assert stats['op_size'] <= 2 and stats['op_evictions'] > 0
+    print('Good fraction cache')
+
+if __name__ == '__main__':
+    test_cache()
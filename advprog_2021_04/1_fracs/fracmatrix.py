@@ -0,0 +1,208 @@
+# fracmatrix.py
+#
+# Exact linear algebra on top of the Fraction class in ex7.py.
+#
+# A FractionMatrix holds a matrix of exact rationals and provides
+# determinant(), solve() and inverse().  Doing Gaussian elimination
+# directly with Fractions works, but every single operation pays for
+# a gcd and the numbers can grow large before they are reduced.
+#
+# Instead, this uses fraction-free (Bareiss) elimination.  Each row is
+# first scaled by the lcm of its denominators, making the matrix all
+# integers.  Elimination then uses the update
+#
+#     a[i][j] = (p * a[i][j] - a[i][k] * a[k][j]) // prev
+#
+# where p is the current pivot and prev is the previous one.  The
+# division is always exact, so there are no gcds at all.  Each update
+# is applied to an entire row at once.  Back substitution also stays in
+# integers (see _back_substitute()).  Fractions are only built for the
+# final results.
+#
+# The gain is in time, not in the size of the numbers.  Every
+# intermediate entry is a minor of the *scaled* integer matrix, and the
+# row scaling makes those minors large.  Naive elimination reduces each
+# fraction as it goes, so its numbers can stay smaller.  For Hilbert
+# matrices (see bench_fracmatrix.py), the largest Bareiss entry at n=50
+# has 1042 bits against 196 for naive elimination.  Bareiss is still
+# about 1.5x faster there, and more so for smaller matrices, because
+# integer arithmetic without gcds is so much cheaper.
+#
+#    >>> m = FractionMatrix([[2, 1], [1, 3]])
+#    >>> m.determinant()
+#    Fraction(5, 1)
+#    >>> m.solve([3, 5])
+#    [Fraction(4, 5), Fraction(7, 5)]
+#    >>>
+
+import math
+
+from ex7 import Fraction
+
+def _as_fraction(x):
+    if isinstance(x, Fraction):
+        return x
+    return Fraction(x.numerator, x.denominator)
+
+def _integer_row(row):
+    # Scale a row of fractions to integers.  Returns (scale, ints)
+    scale = 1
+    for x in row:
+        scale = scale * x.denominator // math.gcd(scale, x.denominator)
+    return scale, [x.numerator * (scale // x.denominator) for x in row]
+
+class SingularMatrixError(ZeroDivisionError):
+    pass
+
+def _bareiss(m, n):
+    # Fraction-free elimination of the integer matrix m (n rows, any
+    # number of columns >= n), done in place.  Leaves m upper
+    # triangular in its first n columns, with the determinant of the
+    # (row-swapped) square block as the last pivot.  Returns the sign of
+    # the row swaps made, or 0 if the matrix is singular.
+    sign = 1
+    prev = 1
+    for k in range(n):
+        if m[k][k] == 0:
+            for i in range(k + 1, n):
+                if m[i][k] != 0:
+                    m[k], m[i] = m[i], m[k]
+                    sign = -sign
+                    break
+            else:
+                return 0
+        pivot_row = m[k]
+        p = pivot_row[k]
+        pivot_tail = pivot_row[k + 1:]
+        zeros = [0] * (k + 1)
+        for i in range(k + 1, n):
+            row = m[i]
+            f = row[k]
+            if f == 0:
+                # Nothing to eliminate, but the row still gets rescaled
+                m[i] = zeros + [p * x // prev for x in row[k + 1:]]
+            else:
+                m[i] = zeros + [(p * x - f * y) // prev for x, y in zip(row[k + 1:], pivot_tail)]
+        prev = p
+    return sign
+
+def _back_substitute(m, n, col):
+    # Solve the triangular system left by _bareiss() for column n + col
+    # of m.  By Cramer's rule, det * x is a vector of integers, so the
+    # whole substitution can stay in exact integer arithmetic.
+    det = m[n - 1][n - 1]
+    y = [0] * n
+    for i in reversed(range(n)):
+        row = m[i]
+        total = det * row[n + col] - sum(row[j] * y[j] for j in range(i + 1, n))
+        y[i] = total // row[i]
+    return [Fraction(v, det) for v in y]
+
+class FractionMatrix:
+    def __init__(self, rows):
+        self.rows = [[_as_fraction(x) for x in row] for row in rows]
+        self.nrows = len(self.rows)
+        self.ncols = len(self.rows[0]) if self.rows else 0
+        if any(len(row) != self.ncols for row in self.rows):
+            raise ValueError('All rows must have the same length')
+
+    @classmethod
+    def identity(cls, n):
+        return cls([[int(i == j) for j in range(n)] for i in range(n)])
+
+    @classmethod
+    def hilbert(cls, n):
+        return cls([[Fraction(1, i + j + 1) for j in range(n)] for i in range(n)])
+
+    def __getitem__(self, index):
+        i, j = index
+        return self.rows[i][j]
+
+    def __eq__(self, other):
+        if not isinstance(other, FractionMatrix):
+            return NotImplemented
+        return self.rows == other.rows
+
+    def __repr__(self):
+        return f'FractionMatrix({self.rows!r})'
+
+    def __matmul__(self, other):
+        if not isinstance(other, FractionMatrix):
+            return NotImplemented
+        if self.ncols != other.nrows:
+            raise ValueError('Matrix dimensions do not match')
+        cols = list(zip(*other.rows))
+        return FractionMatrix([[sum((x * y for x, y in zip(row, col)), Fraction(0)) for col in cols]
+                               for row in self.rows])
+
+    def _check_square(self):
+        if self.nrows != self.ncols:
+            raise ValueError('Matrix must be square')
+
+    def determinant(self):
+        self._check_square()
+        scale = 1
+        m = []
+        for row in self.rows:
+            row_scale, ints = _integer_row(row)
+            scale *= row_scale
+            m.append(ints)
+        sign = _bareiss(m, self.nrows)
+        det = sign * m[-1][-1] if sign and m else sign
+        return Fraction(det, scale)
+
+    def _solve_columns(self, rhs):
+        # Solve self @ X = rhs where rhs is a list of columns.  The
+        # columns are scaled along with the rows of the matrix.
+        self._check_square()
+        n = self.nrows
+        m = []
+        for i, row in enumerate(self.rows):
+            _, ints = _integer_row(row + [_as_fraction(col[i]) for col in rhs])
+            m.append(ints)
+        if _bareiss(m, n) == 0:
+            raise SingularMatrixError('Matrix is singular')
+        return [_back_substitute(m, n, j) for j in range(len(rhs))]
+
+    def solve(self, b):
+        # Solve self @ x = b for a vector b
+        return self._solve_columns([list(b)])[0]
+
+    def inverse(self):
+        n = self.nrows
+        identity = [[int(i == j) for i in range(n)] for j in range(n)]
+        columns = self._solve_columns(identity)
+        return FractionMatrix([list(row) for row in zip(*columns)])
+
+def test_matrix():
+    m = FractionMatrix([[2, 1], [1, 3]])
+    assert m.determinant() == 5
+    assert m.solve([3, 5]) == [Fraction(4, 5), Fraction(7, 5)]
+    assert m @ m.inverse() == FractionMatrix.identity(2)
+
+    # Needs a row swap (zero in the first pivot position)
+    m = FractionMatrix([[0, 2, 1], [1, Fraction(1, 2), 0], [3, 0, Fraction(-2, 3)]])
+    assert m.determinant() == Fraction(-1, 6)
+    inv = m.inverse()
+    assert m @ inv == FractionMatrix.identity(3)
+    assert inv @ m == FractionMatrix.identity(3)
+    x = m.solve([1, 2, 3])
+    assert m @ FractionMatrix([[v] for v in x]) == FractionMatrix([[1], [2], [3]])
+
+    # Hilbert matrices have known determinants: 1/12 and 1/2160 for n = 2, 3
+    assert FractionMatrix.hilbert(2).determinant() == Fraction(1, 12)
+    assert FractionMatrix.hilbert(3).determinant() == Fraction(1, 2160)
+    h = FractionMatrix.hilbert(6)
+    assert h @ h.inverse() == FractionMatrix.identity(6)
+
+    singular = FractionMatrix([[1, 2], [2, 4]])
+    assert singular.determinant() == 0
+    try:
+        singular.inverse()
+        assert False, "Expected SingularMatrixError"
+    except SingularMatrixError:
+        pass
+    print('Good matrices')
+
+if __name__ == '__main__':
+    test_matrix()
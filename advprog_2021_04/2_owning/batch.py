@@ -0,0 +1,120 @@
+# batch.py
+#
+# Batch reporting over many portfolios.
+#
+# Instead of running report.py once per client portfolio, run_batch()
+# takes a directory of portfolio CSV files and one shared prices file.
+# Files are parsed and valued in a pool of worker processes, and only a
+# small summary comes back for each one.
+#
+# The price map is loaded once, not sent along with every task.  Where
+# processes are started by fork (Linux), the parent loads the prices
+# before creating the pool and every worker inherits them for free.
+# Elsewhere, each worker loads the prices file once when it starts.
+#
+#     shell % python batch.py portfolios/ prices.csv [workers]
+
+import glob
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+
+import report
+import stream
+
+class PortfolioSummary(NamedTuple):
+    filename : str
+    holdings : int
+    cost : float
+    value : float
+
+    @property
+    def change(self):
+        return self.value - self.cost
+
+class BatchSummary(NamedTuple):
+    portfolios : list
+    holdings : int
+    cost : float
+    value : float
+
+    @property
+    def change(self):
+        return self.value - self.cost
+
+# Price map of the current worker (or of the parent, before forking)
+_prices = None
+
+def _init_worker(prices_file):
+    global _prices
+    if _prices is None:
+        _prices = report.read_prices(prices_file)
+
+def summarize(filename):
+    prices = _prices
+    holdings = 0
+    cost = 0
+    value = 0
+    for h in stream.iter_portfolio(filename):
+        holdings += 1
+        cost += h.shares * h.price
+        value += h.shares * prices[h.name]
+    return PortfolioSummary(filename, holdings, cost, value)
+
+def run_batch(directory, prices_file, workers=None):
+    global _prices
+    files = sorted(glob.glob(os.path.join(directory, '*.csv')))
+    if 'fork' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('fork')
+        _prices = report.read_prices(prices_file)
+    else:
+        context = multiprocessing.get_context('spawn')
+        _prices = None
+    try:
+        workers = workers or os.cpu_count()
+        chunksize = max(1, len(files) // (workers * 4))
+        with ProcessPoolExecutor(workers, mp_context=context, initializer=_init_worker,
+                                 initargs=(prices_file,)) as pool:
+            summaries = list(pool.map(summarize, files, chunksize=chunksize))
+    finally:
+        _prices = None
+    return BatchSummary(summaries,
+                        sum(s.holdings for s in summaries),
+                        sum(s.cost for s in summaries),
+                        sum(s.value for s in summaries))
+
+def print_batch_summary(batch):
+    print('{:30} {:>10} {:>14} {:>14} {:>14}'.format('Portfolio', 'Holdings', 'Cost', 'Value', 'Change'))
+    print('-'*30 + ' ' + '-'*10 + (' ' + '-'*14)*3)
+    for s in batch.portfolios:
+        print(f'{os.path.basename(s.filename):<30} {s.holdings:>10} {s.cost:>14.2f} '
+              f'{s.value:>14.2f} {s.change:>14.2f}')
+    print('\nSummary:\n')
+    print(f'Portfolios: {len(batch.portfolios)}')
+    print(f'Holdings: {batch.holdings}')
+    print(f'Initial cost: {batch.cost:0.2f}')
+    print(f'Current value: {batch.value:0.2f}')
+    print(f'Change: {batch.change:0.2f}')
+
+def test_batch():
+    import shutil
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for n in range(5):
+            shutil.copy('portfolio.csv', os.path.join(tmpdir, f'client{n}.csv'))
+        batch = run_batch(tmpdir, 'prices.csv', workers=2)
+    assert len(batch.portfolios) == 5
+    assert batch.holdings == 35
+    assert all(round(s.cost, 2) == 44671.15 for s in batch.portfolios)
+    assert all(round(s.value, 2) == 28686.10 for s in batch.portfolios)
+    assert round(batch.value, 2) == round(5 * 28686.10, 2)
+    print('Good batch')
+
+if __name__ == '__main__':
+    if len(sys.argv) >= 3:
+        workers = int(sys.argv[3]) if len(sys.argv) > 3 else None
+        print_batch_summary(run_batch(sys.argv[1], sys.argv[2], workers))
+    else:
+        test_batch()
@@ -0,0 +1,39 @@
+# bench_batch.py
+#
+# Throughput of batch.run_batch() over a directory of synthetic client
+# portfolios with 1, 2, 4 and N (= os.cpu_count()) worker processes.
+#
+#     shell % python bench_batch.py [files] [rows per file]
+
+import os
+import sys
+import tempfile
+import time
+
+import batch
+import bench_data
+
+def main(files=400, rows=2_500):
+    symbols = bench_data.make_symbols(500)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        prices_file = bench_data.write_prices(os.path.join(tmpdir, 'prices.csv'), symbols)
+        directory = os.path.join(tmpdir, 'portfolios')
+        os.mkdir(directory)
+        for n in range(files):
+            bench_data.write_portfolio(os.path.join(directory, f'client{n:05d}.csv'), rows,
+                                       symbols, seed=n)
+
+        print(f'{files} portfolios x {rows} rows, {os.cpu_count()} CPUs')
+        print(f'{"workers":>8} {"time (s)":>10} {"portfolios/s":>13} {"holdings/s":>12}')
+        expected = None
+        for workers in sorted({1, 2, 4, os.cpu_count()}):
+            start = time.perf_counter()
+            result = batch.run_batch(directory, prices_file, workers)
+            elapsed = time.perf_counter() - start
+            expected = expected or result
+            assert result == expected
+            print(f'{workers:>8} {elapsed:>10.3f} {files / elapsed:>13.1f} '
+                  f'{result.holdings / elapsed:>12.0f}')
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
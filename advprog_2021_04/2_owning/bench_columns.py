@@ -0,0 +1,62 @@
+# bench_columns.py
+#
+# Memory per holding and load time of the different portfolio
+# representations:
+#
+#   - report.read_portfolio()          list of Holding instances
+#   - ex2.read_portfolio_as_columns()  dict of Python lists
+#   - ex2.PortfolioColumns             typed arrays + name categories
+#
+#     shell % python bench_columns.py [rows]
+
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+
+import bench_data
+import ex2
+import report
+
+def measure(loader, filename):
+    # Returns (object, seconds, bytes still allocated after loading)
+    start = time.perf_counter()
+    loader(filename)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    obj = loader(filename)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, elapsed, current
+
+def main(rows=1_000_000):
+    symbols = bench_data.make_symbols(500)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filename = bench_data.write_portfolio(os.path.join(tmpdir, 'portfolio.csv'), rows, symbols)
+        prices = bench_data.write_prices(os.path.join(tmpdir, 'prices.csv'), symbols)
+        prices = report.read_prices(prices)
+
+        loaders = [
+            ('list of Holding', report.read_portfolio),
+            ('dict of lists', ex2.read_portfolio_as_columns),
+            ('PortfolioColumns', ex2.PortfolioColumns.from_csv),
+        ]
+        print(f'{rows} rows, {len(symbols)} distinct names')
+        print(f'{"representation":<18} {"load (s)":>10} {"bytes/holding":>14}')
+        outputs = []
+        for label, loader in loaders:
+            portfolio, elapsed, current = measure(loader, filename)
+            print(f'{label:<18} {elapsed:>10.3f} {current / rows:>14.1f}')
+            if not isinstance(portfolio, dict):
+                out = io.StringIO()
+                with redirect_stdout(out):
+                    report.print_report(portfolio, prices)
+                outputs.append(out.getvalue())
+            del portfolio
+        assert outputs[0] == outputs[1], 'print_report() output differs'
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
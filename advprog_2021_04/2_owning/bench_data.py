@@ -0,0 +1,33 @@
+# bench_data.py
+#
+# Synthetic portfolio and price files for the benchmarks in this
+# directory.  The files have the same layout as portfolio.csv and
+# prices.csv, just a lot bigger.
+
+import csv
+import random
+
+def make_symbols(count, seed=1):
+    rng = random.Random(seed)
+    letters = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+    symbols = set()
+    while len(symbols) < count:
+        symbols.add(''.join(rng.choice(letters) for _ in range(rng.randint(2, 5))))
+    return sorted(symbols)
+
+def write_portfolio(filename, rows, symbols, seed=2):
+    rng = random.Random(seed)
+    with open(filename, 'w', newline='') as file:
+        writer = csv.writer(file, quoting=csv.QUOTE_NONNUMERIC)
+        file.write('name,shares,price\n')
+        for _ in range(rows):
+            writer.writerow([rng.choice(symbols), rng.randint(1, 1000), round(rng.uniform(1, 500), 2)])
+    return filename
+
+def write_prices(filename, symbols, seed=3):
+    rng = random.Random(seed)
+    with open(filename, 'w', newline='') as file:
+        writer = csv.writer(file, quoting=csv.QUOTE_NONNUMERIC)
+        for name in symbols:
+            writer.writerow([name, round(rng.uniform(1, 500), 2)])
+    return filename
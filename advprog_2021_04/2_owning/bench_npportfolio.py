@@ -0,0 +1,96 @@
+# bench_npportfolio.py
+#
+# Compare three portfolio backends:
+#
+#   - report.read_portfolio()  (a list of Holding objects)
+#   - ex3.PandasPortfolio
+#   - npportfolio.NumpyPortfolio
+#
+# First, the cost of just importing each backend (each import runs in
+# a fresh interpreter, best of several runs).  Second, the time to load
+# a large portfolio file and to compute its cost and current value.
+# NumpyPortfolio sorts out the distinct names on the first call to
+# value(), so that first call is shown separately.
+#
+#     shell % python bench_npportfolio.py [rows]
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import bench_data
+import ex3
+import npportfolio
+import report
+
+REPEAT = 5
+
+def import_time(module):
+    best = float('inf')
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', f'import {module}'], check=True,
+                       cwd=os.path.dirname(os.path.abspath(__file__)))
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def timed(func, *args):
+    best = float('inf')
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+def list_cost(portfolio):
+    return sum(h.shares * h.price for h in portfolio)
+
+def list_value(portfolio, prices):
+    return sum(h.shares * prices[h.name] for h in portfolio)
+
+def pandas_cost(portfolio):
+    return float((portfolio.data['shares'] * portfolio.data['price']).sum())
+
+def pandas_value(portfolio, prices):
+    return float((portfolio.data['shares'] * portfolio.data['name'].map(prices)).sum())
+
+def main(rows=1_000_000):
+    print(f'{"import":<10} {"time (s)":>10}')
+    print(f'{"(none)":<10} {import_time("sys"):>10.3f}')
+    for module in ('report', 'ex3', 'npportfolio'):
+        print(f'{module:<10} {import_time(module):>10.3f}')
+
+    symbols = bench_data.make_symbols(500)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        prices_file = bench_data.write_prices(os.path.join(tmpdir, 'prices.csv'), symbols)
+        portfolio_file = bench_data.write_portfolio(os.path.join(tmpdir, 'portfolio.csv'),
+                                                    rows, symbols)
+        prices = report.read_prices(prices_file)
+        table = npportfolio.PriceTable.from_mapping(prices)
+
+        plain, plain_load = timed(report.read_portfolio, portfolio_file)
+        pdport, pd_load = timed(ex3.PandasPortfolio.from_csv, portfolio_file)
+        npport, np_load = timed(npportfolio.NumpyPortfolio.from_csv, portfolio_file)
+
+        cost1, plain_cost = timed(list_cost, plain)
+        cost2, pd_cost = timed(pandas_cost, pdport)
+        cost3, np_cost = timed(npport.cost)
+        value1, plain_value = timed(list_value, plain, prices)
+        value2, pd_value = timed(pandas_value, pdport, prices)
+        value3, np_first = timed(lambda: npportfolio.NumpyPortfolio(npport.data).value(table))
+        value3, np_value = timed(npport.value, table)
+        assert abs(cost1 - cost3) <= 1e-9 * cost1 and abs(cost2 - cost3) <= 1e-9 * cost1
+        assert abs(value1 - value3) <= 1e-9 * value1 and abs(value2 - value3) <= 1e-9 * value1
+
+    print()
+    print(f'{rows} rows')
+    print(f'{"backend":<10} {"load (s)":>10} {"cost (s)":>10} {"value (s)":>10}')
+    print(f'{"list":<10} {plain_load:>10.3f} {plain_cost:>10.4f} {plain_value:>10.4f}')
+    print(f'{"pandas":<10} {pd_load:>10.3f} {pd_cost:>10.4f} {pd_value:>10.4f}')
+    print(f'{"numpy":<10} {np_load:>10.3f} {np_cost:>10.4f} {np_value:>10.4f}'
+          f'   ({np_first:.4f} s for the first call)')
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,65 @@
+# bench_pricemap.py
+#
+# Report latency with prices coming from the local quote server
+# (quoteserver.py) through ex4.PriceMap, for portfolios with 10, 1k
+# and 100k symbols:
+#
+#   - per-symbol  no prefetch, so every holding costs one round trip
+#                 (skipped above PER_SYMBOL_LIMIT symbols)
+#   - batched     one prefetch request, then the report
+#   - cached      the report again with every quote in the cache
+#
+#     shell % python bench_pricemap.py
+
+import io
+import random
+import sys
+import time
+from contextlib import redirect_stdout
+
+import bench_data
+import report
+from ex4 import PriceMap
+from quoteserver import QuoteServer
+
+PER_SYMBOL_LIMIT = 1000
+
+def run_report(portfolio, prices):
+    with redirect_stdout(io.StringIO()):
+        report.print_report(portfolio, prices)
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+def main(sizes=(10, 1_000, 100_000)):
+    rng = random.Random(5)
+    print(f'{"symbols":>8} {"per-symbol (s)":>15} {"batched (s)":>12} {"cached (s)":>11}')
+    for size in sizes:
+        symbols = bench_data.make_symbols(size)
+        server = QuoteServer({name: round(rng.uniform(1, 500), 2) for name in symbols}).start()
+        portfolio = [report.Holding(name, 100, 50.0) for name in symbols]
+        try:
+            if size <= PER_SYMBOL_LIMIT:
+                cold = PriceMap(*server.address)
+                per_symbol = f'{timed(run_report, portfolio, cold):>15.4f}'
+                cold.close()
+            else:
+                per_symbol = f'{"-":>15}'
+
+            def batched():
+                prices = PriceMap.for_portfolio(portfolio, *server.address)
+                run_report(portfolio, prices)
+                return prices
+            start = time.perf_counter()
+            prices = batched()
+            batch_time = time.perf_counter() - start
+            cached = timed(run_report, portfolio, prices)
+            prices.close()
+            print(f'{size:>8} {per_symbol} {batch_time:>12.4f} {cached:>11.4f}')
+        finally:
+            server.stop()
+
+if __name__ == '__main__':
+    main(tuple(int(arg) for arg in sys.argv[1:]) or (10, 1_000, 100_000))
@@ -0,0 +1,93 @@
+# bench_query.py
+#
+# Aggregate queries on a large in-memory portfolio: total shares,
+# average purchase price and the top 10 names by unrealized change.
+# Answering each query with a linear scan of the holdings is compared
+# with building a PortfolioIndex once and querying that.
+#
+#     shell % python bench_query.py [rows] [queries]
+#
+# The default is 1M rows.  Try 10_000_000 for a portfolio that is
+# about the size of a large brokerage account export (building it
+# takes a while).
+
+import heapq
+import random
+import sys
+import time
+
+import bench_data
+from ex2 import PortfolioColumns
+from query import PortfolioIndex
+
+def make_portfolio(rows, symbols, seed=2):
+    rng = random.Random(seed)
+    columns = PortfolioColumns()
+    for _ in range(rows):
+        columns._append(rng.choice(symbols), rng.randint(1, 1000), round(rng.uniform(1, 500), 2))
+    return columns
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+# Linear scans, one per query
+def scan_shares(portfolio, name):
+    return sum(h.shares for h in portfolio if h.name == name)
+
+def scan_avg_price(portfolio, name):
+    shares = cost = 0
+    for h in portfolio:
+        if h.name == name:
+            shares += h.shares
+            cost += h.shares * h.price
+    return cost / shares
+
+def scan_top_changes(portfolio, prices, n=10):
+    changes = { }
+    for h in portfolio:
+        changes[h.name] = changes.get(h.name, 0.0) + h.shares * (prices[h.name] - h.price)
+    return heapq.nlargest(n, changes.items(), key=lambda item: item[1])
+
+def main(rows=1_000_000, queries=5):
+    symbols = bench_data.make_symbols(500)
+    rng = random.Random(5)
+    prices = {name: round(rng.uniform(1, 500), 2) for name in symbols}
+    names = rng.sample(symbols, queries)
+
+    portfolio, build_time = timed(make_portfolio, rows, symbols)
+    print(f'{rows} rows, {len(symbols)} names (generated in {build_time:.1f} s)')
+    print()
+
+    scan = {'shares': 0.0, 'avg price': 0.0, 'top 10': 0.0}
+    scan_results = []
+    for name in names:
+        shares, t1 = timed(scan_shares, portfolio, name)
+        avg, t2 = timed(scan_avg_price, portfolio, name)
+        scan['shares'] += t1
+        scan['avg price'] += t2
+        scan_results.append((shares, avg))
+    top, scan['top 10'] = timed(scan_top_changes, portfolio, prices)
+
+    index, index_time = timed(PortfolioIndex, portfolio)
+    indexed = {'shares': 0.0, 'avg price': 0.0, 'top 10': 0.0}
+    for name, (shares, avg) in zip(names, scan_results):
+        s, t1 = timed(index.sum, 'shares', name)
+        a, t2 = timed(index.weighted_avg, 'price', 'shares', name)
+        assert s == shares and abs(a - avg) <= 1e-9 * avg
+        indexed['shares'] += t1
+        indexed['avg price'] += t2
+    itop, indexed['top 10'] = timed(index.top_changes, prices, 10)
+    assert [n for n, _ in itop] == [n for n, _ in top]
+
+    print(f'Building the index: {index_time:.3f} s (once)')
+    print()
+    print(f'{"query":<12} {"scan (s/query)":>16} {"index (s/query)":>16} {"speedup":>10}')
+    for query in scan:
+        count = 1 if query == 'top 10' else queries
+        s, i = scan[query] / count, indexed[query] / count
+        print(f'{query:<12} {s:>16.4f} {i:>16.7f} {s / i:>9.0f}x')
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,62 @@
+# bench_render.py
+#
+# Rows per second of report output: report.print_report() against
+# render.render_report() in each format.  Output goes to /dev/null
+# through a normal (block buffered) file and through a line buffered
+# one, which is how stdout behaves when it's a terminal.
+#
+#     shell % python bench_render.py [rows]
+
+import os
+import random
+import sys
+import time
+from contextlib import redirect_stdout
+
+import bench_data
+import report
+from render import render_report
+
+def make_portfolio(rows, symbols, seed=2):
+    rng = random.Random(seed)
+    return [report.Holding(rng.choice(symbols), rng.randint(1, 1000), round(rng.uniform(1, 500), 2))
+            for _ in range(rows)]
+
+REPEAT = 3
+
+def timed(func, *args):
+    best = float('inf')
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def print_report_to(file, portfolio, prices):
+    with redirect_stdout(file):
+        report.print_report(portfolio, prices)
+
+def main(rows=200_000):
+    symbols = bench_data.make_symbols(500)
+    rng = random.Random(5)
+    prices = {name: round(rng.uniform(1, 500), 2) for name in symbols}
+    portfolio = make_portfolio(rows, symbols)
+
+    print(f'{rows} rows, rows/s')
+    print(f'{"":<24} {"buffered":>12} {"line buffered":>14}')
+    cases = [
+        ('print_report', lambda f: print_report_to(f, portfolio, prices)),
+        ('render table', lambda f: render_report(portfolio, prices, file=f)),
+        ('render csv', lambda f: render_report(portfolio, prices, file=f, format='csv')),
+        ('render jsonl', lambda f: render_report(portfolio, prices, file=f, format='jsonl')),
+        ('render table limit=20', lambda f: render_report(portfolio, prices, file=f, limit=20)),
+    ]
+    for label, func in cases:
+        row = f'{label:<24}'
+        for buffering in (-1, 1):
+            with open(os.devnull, 'w', buffering=buffering) as file:
+                row += f' {rows / timed(func, file):>13.0f}'
+        print(row)
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
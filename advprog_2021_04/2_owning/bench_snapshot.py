@@ -0,0 +1,55 @@
+# bench_snapshot.py
+#
+# Startup cost of loading a portfolio from CSV versus opening a binary
+# snapshot (snapshot.py), plus the time to compute the report totals
+# from each.
+#
+#     shell % python bench_snapshot.py [rows]
+
+import os
+import sys
+import tempfile
+import time
+
+import bench_data
+import report
+from ex2 import PortfolioColumns
+from snapshot import SnapshotPortfolio, csv_to_snapshot
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+def totals(portfolio, prices):
+    cost = sum(h.shares * h.price for h in portfolio)
+    value = sum(h.shares * prices[h.name] for h in portfolio)
+    return cost, value
+
+def main(rows=1_000_000):
+    symbols = bench_data.make_symbols(500)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        csvfile = bench_data.write_portfolio(os.path.join(tmpdir, 'portfolio.csv'), rows, symbols)
+        prices = report.read_prices(bench_data.write_prices(os.path.join(tmpdir, 'prices.csv'), symbols))
+        snapfile = os.path.join(tmpdir, 'portfolio.snap')
+        _, convert = timed(csv_to_snapshot, csvfile, snapfile)
+
+        print(f'{rows} rows: csv {os.path.getsize(csvfile) / 2**20:.1f} MB, '
+              f'snapshot {os.path.getsize(snapfile) / 2**20:.1f} MB, conversion {convert:.3f} s')
+        print(f'{"source":<28} {"load (s)":>10} {"totals (s)":>11}')
+        expected = None
+        for label, loader, filename in [
+            ('report.read_portfolio', report.read_portfolio, csvfile),
+            ('PortfolioColumns.from_csv', PortfolioColumns.from_csv, csvfile),
+            ('SnapshotPortfolio.open', SnapshotPortfolio.open, snapfile),
+        ]:
+            portfolio, load = timed(loader, filename)
+            result, compute = timed(totals, portfolio, prices)
+            expected = expected or result
+            assert result == expected
+            print(f'{label:<28} {load:>10.4f} {compute:>11.3f}')
+            if isinstance(portfolio, SnapshotPortfolio):
+                portfolio.close()
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,56 @@
+# bench_stream.py
+#
+# Peak memory (RSS) of producing a report as the portfolio file grows:
+#
+#   - report.read_portfolio() + report.print_report()
+#   - stream.iter_portfolio() + stream.stream_report()
+#
+# Each measurement runs in a fresh subprocess so that the peak RSS of
+# one run doesn't hide the next.  Output is discarded.
+#
+#     shell % python bench_stream.py [maxrows]
+
+import os
+import subprocess
+import sys
+import tempfile
+
+import bench_data
+
+SCRIPT = '''
+import os, resource, sys
+sys.stdout = open(os.devnull, 'w')
+import report, stream
+portfolio_file, prices_file, mode = sys.argv[1:]
+prices = report.read_prices(prices_file)
+if mode == 'report':
+    report.print_report(report.read_portfolio(portfolio_file), prices)
+else:
+    stream.stream_report(stream.iter_portfolio(portfolio_file), prices)
+sys.stdout = sys.__stdout__
+print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+'''
+
+def peak_rss_mb(portfolio_file, prices_file, mode):
+    out = subprocess.run([sys.executable, '-c', SCRIPT, portfolio_file, prices_file, mode],
+                         capture_output=True, text=True, check=True,
+                         cwd=os.path.dirname(os.path.abspath(__file__)))
+    return int(out.stdout) / 1024      # ru_maxrss is in KB on Linux
+
+def main(maxrows=2_000_000):
+    symbols = bench_data.make_symbols(500)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        prices_file = bench_data.write_prices(os.path.join(tmpdir, 'prices.csv'), symbols)
+        print(f'{"rows":>10} {"file (MB)":>10} {"report (MB)":>12} {"stream (MB)":>12}')
+        rows = 10_000
+        while rows <= maxrows:
+            portfolio_file = bench_data.write_portfolio(os.path.join(tmpdir, 'portfolio.csv'),
+                                                        rows, symbols)
+            size = os.path.getsize(portfolio_file) / 2**20
+            full = peak_rss_mb(portfolio_file, prices_file, 'report')
+            streamed = peak_rss_mb(portfolio_file, prices_file, 'stream')
+            print(f'{rows:>10} {size:>10.1f} {full:>12.1f} {streamed:>12.1f}')
+            rows *= 4
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,81 @@
+# bench_valuation.py
+#
+# Replay a synthetic stream of price ticks against a portfolio and
+# measure the latency from a tick arriving to the portfolio value being
+# up to date.  The incremental Valuation is compared with recomputing
+# the value from scratch (as print_report() does) on every tick.
+#
+#     shell % python bench_valuation.py [holdings] [ticks]
+
+import random
+import statistics
+import sys
+import time
+
+import bench_data
+from report import Holding
+from valuation import Valuation
+
+def make_portfolio(holdings, symbols, seed=2):
+    rng = random.Random(seed)
+    return [Holding(rng.choice(symbols), rng.randint(1, 1000), round(rng.uniform(1, 500), 2))
+            for _ in range(holdings)]
+
+def make_ticks(count, prices, seed=4):
+    # A random walk of prices over randomly chosen symbols
+    rng = random.Random(seed)
+    current = dict(prices)
+    names = list(current)
+    ticks = []
+    for _ in range(count):
+        name = rng.choice(names)
+        current[name] = max(0.01, round(current[name] * rng.uniform(0.99, 1.01), 2))
+        ticks.append((name, current[name]))
+    return ticks
+
+def percentiles(samples):
+    samples = sorted(samples)
+    pick = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))]
+    return statistics.mean(samples), pick(0.5), pick(0.99), samples[-1]
+
+def main(holdings=100_000, ticks=100_000):
+    symbols = bench_data.make_symbols(500)
+    portfolio = make_portfolio(holdings, symbols)
+    prices = {name: 100.0 for name in symbols}
+    stream = make_ticks(ticks, prices)
+
+    start = time.perf_counter()
+    v = Valuation(portfolio, prices)
+    build = time.perf_counter() - start
+
+    clock = time.perf_counter_ns
+    incremental = []
+    for name, price in stream:
+        t0 = clock()
+        v.update(name, price)
+        value = v.value
+        incremental.append(clock() - t0)
+
+    # Recomputing from scratch is far slower, so only replay a prefix
+    recompute = []
+    live = dict(prices)
+    for name, price in stream[:200]:
+        t0 = clock()
+        live[name] = price
+        value = sum(h.shares * live[h.name] for h in portfolio)
+        recompute.append(clock() - t0)
+
+    v.refresh()
+    final = {**prices, **dict(stream)}
+    exact = sum(h.shares * final[h.name] for h in portfolio)
+    assert abs(v.value - exact) <= 1e-6 * abs(exact)
+
+    print(f'{holdings} holdings over {len(symbols)} symbols, {ticks} ticks, '
+          f'index built in {build:.3f} s')
+    print(f'{"method":<14} {"mean (us)":>10} {"p50 (us)":>10} {"p99 (us)":>10} {"max (us)":>10}')
+    for label, samples in [('incremental', incremental), ('recompute', recompute)]:
+        mean, p50, p99, worst = (x / 1000 for x in percentiles(samples))
+        print(f'{label:<14} {mean:>10.2f} {p50:>10.2f} {p99:>10.2f} {worst:>10.2f}')
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
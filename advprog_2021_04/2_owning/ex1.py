@@ -16,48 +16,61 @@
 # without modification!
 # -----------------------------------------------------------------------------
 
-import report
+import csv
 
+import report
+from report import Holding
 
 class Portfolio:
-    
-    def __init__(self, filename):
-        self.filename = filename
-        self.portfolio = []
-        self.prices = {}
+    def __init__(self):
+        self.holdings = []
 
+    def append(self, holding):
+        self.holdings.append(holding)
 
-    # You define (copy/adapt code from report.py)
     @classmethod
     def from_csv(cls, filename):
+        self = cls()
         with open(filename, "r") as file:
             rows = csv.reader(file)
             next(rows)
             for row in rows:
-                h = Holding(row[0], int(row[1]), float(row[2]))
-                portfolio.append(h)
-        return portfolio
+                self.append(Holding(row[0], int(row[1]), float(row[2])))
+        return self
+
+    def __len__(self):
+        return len(self.holdings)
+
+    def __getitem__(self, index):
+        return self.holdings[index]
+
+    def __iter__(self):
+        return iter(self.holdings)
 
 class PriceMap:
-    ...
-    # You define
+    def __init__(self):
+        self.prices = {}
+
     @classmethod
     def from_csv(cls, filename):
-        print('{:10} {:10} {:10} {:10}'.format('Name', 'Shares', 'Price', 'Change'))
-        print(('-'*10 + ' ')*4)
-        for h in portfolio:
-            current_price = prices[h.name]
-            change = current_price - h.price
-            print(f'{h.name:>10} {h.shares:>10} {current_price:>10.2f} {change:>10.2f}')
-
-        cost = sum(h.shares * h.price for h in portfolio)
-        value = sum(h.shares * prices[h.name] for h in portfolio)
-        print('\nSummary:\n')
-        print(f'Initial cost: {cost:0.2f}')
-        print(f'Current value: {value:0.2f}')
-        print(f'Change: {value-cost:0.2f}')
-
-        ...
+        self = cls()
+        with open(filename, "r") as file:
+            rows = csv.reader(file)
+            for row in rows:
+                self.prices[row[0]] = float(row[1])
+        return self
+
+    def __getitem__(self, name):
+        return self.prices[name]
+
+    def __contains__(self, name):
+        return name in self.prices
+
+    def __len__(self):
+        return len(self.prices)
+
+    def __iter__(self):
+        return iter(self.prices)
 
 if __name__ == '__main__':
     # Create Portfolio and PriceMap objects from CSV files
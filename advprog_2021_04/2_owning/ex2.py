@@ -31,8 +31,9 @@ def read_portfolio_as_columns(filename):
 # at the resulting data structure.  Make sure you understand what's
 # happening and how it's different than before.
 
-columns = read_portfolio_as_columns('portfolio.csv')
-print(columns)                                
+if __name__ == '__main__':
+    columns = read_portfolio_as_columns('portfolio.csv')
+    print(columns)
 
 
 # -----------------------------------------------------------------------------
@@ -52,28 +53,105 @@ print(columns)
 # `report.py`.   So, you're going to need to figure out some way to
 # perform some kind of adaptation of the data.
 
+# The columns are stored in typed arrays instead of lists.  Shares and
+# prices are kept as raw machine values in array('q') and array('d').
+# Names repeat a lot, so each distinct name is stored once in a
+# category table, and the name column only holds small integer codes.
+# Rows are presented to the outside world through lightweight views
+# that are only created when someone asks for them.
+
+from array import array
+
+class HoldingView:
+    __slots__ = ('_columns', '_index')
+
+    def __init__(self, columns, index):
+        self._columns = columns
+        self._index = index
+
+    @property
+    def name(self):
+        return self._columns.categories[self._columns.name_codes[self._index]]
+
+    @property
+    def shares(self):
+        return self._columns.shares[self._index]
+
+    @property
+    def price(self):
+        return self._columns.price[self._index]
+
+    def __repr__(self):
+        return f'Holding({self.name!r}, {self.shares!r}, {self.price!r})'
+
 class PortfolioColumns:
+    def __init__(self):
+        self.name_codes = array('I')
+        self.shares = array('q')
+        self.price = array('d')
+        self.categories = []        # code -> name
+        self._codes = {}            # name -> code
+
+    def append(self, holding):
+        self._append(holding.name, holding.shares, holding.price)
+
+    def _append(self, name, shares, price):
+        code = self._codes.get(name)
+        if code is None:
+            code = self._codes[name] = len(self.categories)
+            self.categories.append(name)
+        self.name_codes.append(code)
+        self.shares.append(shares)
+        self.price.append(price)
+
     @classmethod
     def from_csv(cls, filename):
-            columns = {
-            'name': [],
-            'shares': [],
-            'price': []
-            }
-        
+        self = cls()
+        codes = self._codes
+        categories = self.categories
+        add_code = self.name_codes.append
+        add_shares = self.shares.append
+        add_price = self.price.append
         with open(filename, 'rt') as file:
             rows = csv.reader(file)
             next(rows)    # Skip headers
-            for row in rows:
-                columns['name'].append(row[0])
-                columns['shares'].append(int(row[1]))
-                columns['price'].append(float(row[2]))
-        return columns
-        self.data = read_portfolio_as_columns(filename)
+            for name, shares, price in rows:
+                code = codes.get(name)
+                if code is None:
+                    code = codes[name] = len(categories)
+                    categories.append(name)
+                add_code(code)
+                add_shares(int(shares))
+                add_price(float(price))
         return self
 
-    ...
-    # More definitions will be needed
+    @property
+    def names(self):
+        categories = self.categories
+        return [categories[code] for code in self.name_codes]
+
+    def __len__(self):
+        return len(self.shares)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            # A new PortfolioColumns with the same name codes
+            part = type(self)()
+            part.name_codes = self.name_codes[index]
+            part.shares = self.shares[index]
+            part.price = self.price[index]
+            part.categories = list(self.categories)
+            part._codes = dict(self._codes)
+            return part
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('portfolio index out of range')
+        return HoldingView(self, index)
+
+    def __iter__(self):
+        for index in range(len(self.shares)):
+            yield HoldingView(self, index)
 
 def main():
     import report
@@ -83,14 +161,23 @@ def main():
     # This should work without modification
     report.print_report(portfolio, prices)
 
-# Uncomment when ready
-# main()
-
-
-    
-    
-
-    
-        
-
-
+def test_columns():
+    import report
+    portfolio = PortfolioColumns.from_csv('portfolio.csv')
+    expected = report.read_portfolio('portfolio.csv')
+    assert len(portfolio) == len(expected)
+    for h, e in zip(portfolio, expected):
+        assert (h.name, h.shares, h.price) == (e.name, e.shares, e.price)
+    assert portfolio[-1].name == 'IBM'
+    assert portfolio.categories == ['AA', 'IBM', 'CAT', 'MSFT', 'GE']
+    part = portfolio[1:6:2]
+    assert isinstance(part, PortfolioColumns)
+    assert [(h.name, h.shares, h.price) for h in part] == [
+        (e.name, e.shares, e.price) for e in expected[1:6:2]]
+    part.append(report.Holding('NEW', 1, 2.0))
+    assert 'NEW' not in portfolio.categories
+    print('Good columns')
+
+if __name__ == '__main__':
+    test_columns()
+    main()
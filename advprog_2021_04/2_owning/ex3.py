@@ -26,15 +26,29 @@
 
 import pandas
 
+from report import Holding
+
 class PandasPortfolio:
+    def __init__(self, data):
+        self.data = data
+
     @classmethod
     def from_csv(cls, filename):
-        ...
-        self.data = pandas.read_csv(filename)
-        ...
-    # You need to define additional methods
-    ...
-    
+        return cls(pandas.read_csv(filename))
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return type(self)(self.data.iloc[index])
+        row = self.data.iloc[index]
+        return Holding(row['name'], int(row['shares']), float(row['price']))
+
+    def __iter__(self):
+        for name, shares, price in self.data.itertuples(index=False):
+            yield Holding(name, int(shares), float(price))
+
 def main():
     import report
     import ex1
@@ -11,25 +11,238 @@
 # such as requests, beautifulsoup, and others to scrape it off
 # a public website.
 
+# The PriceMap below gets its quotes from a web service over HTTP (the
+# local stand-in in quoteserver.py, for instance).  Fetching a quote
+# inside print_report()'s loop would mean one round trip per holding,
+# so instead:
+#
+#   - Every symbol in a portfolio is requested in a single batched
+#     request (prefetch()) before the report starts.
+#   - Connections are kept alive and reused from a small pool.
+#   - Quotes are cached for `ttl` seconds.  After that, a lookup still
+#     returns the stale quote immediately, but triggers a background
+#     refresh (stale-while-revalidate).  Quotes older than `max_stale`
+#     seconds (if set) are fetched again before being returned.
+#   - Stale names are collected in a pending set.  A single background
+#     worker waits `batch_delay` seconds so that the rest of a report's
+#     lookups can join in, then refreshes all of them with one batched
+#     request.
+
+import http.client
+import json
+import queue
+import threading
+import time
+
 import report
 
+class ConnectionPool:
+    def __init__(self, host, port, size=4, timeout=10):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._idle = queue.LifoQueue(maxsize=size)
+
+    def request(self, method, path, body, headers):
+        # Send a request on a pooled connection.  If a kept-alive
+        # connection turns out to have been closed, retry once on a
+        # new one.
+        for attempt in range(2):
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                conn.request(method, path, body, headers)
+                response = conn.getresponse()
+                data = response.read()
+            except (http.client.HTTPException, OSError):
+                # OSError covers ConnectionError and socket timeouts
+                conn.close()
+                if attempt:
+                    raise
+                continue
+            except BaseException:
+                conn.close()
+                raise
+            try:
+                self._idle.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+            return response.status, data
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
 class PriceMap:
-    ...
+    def __init__(self, host, port, ttl=60.0, max_stale=None, batch_delay=0.05,
+                 clock=time.monotonic):
+        self.pool = ConnectionPool(host, port)
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.batch_delay = batch_delay
+        self.clock = clock
+        self._quotes = { }            # name -> (price, time fetched)
+        self._pending = set()         # stale names waiting for a refresh
+        self._refreshing = set()      # names with a refresh in flight
+        self._worker = None           # background refresh thread, if running
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_portfolio(cls, portfolio, host, port, **kwargs):
+        self = cls(host, port, **kwargs)
+        self.prefetch({h.name for h in portfolio})
+        return self
+
+    def fetch(self, names):
+        # One batched request for all of the given names
+        names = list(names)
+        if not names:
+            return
+        status, data = self.pool.request('POST', '/quotes', json.dumps(names).encode('utf-8'),
+                                         {'Content-Type': 'application/json'})
+        if status != 200:
+            raise RuntimeError(f'Quote request failed with status {status}')
+        now = self.clock()
+        quotes = json.loads(data)
+        with self._lock:
+            for name, price in quotes.items():
+                self._quotes[name] = (price, now)
+
+    def prefetch(self, names):
+        # Fetch every name that isn't already fresh in the cache
+        now = self.clock()
+        self.fetch([name for name in names
+                    if name not in self._quotes or now - self._quotes[name][1] > self.ttl])
+
+    def _schedule(self, name):
+        # Add a stale name to the pending set, starting the refresh
+        # worker if it isn't already running
+        with self._lock:
+            if name in self._refreshing:
+                return
+            self._pending.add(name)
+            if self._worker is not None:
+                return
+            self._worker = threading.Thread(target=self._revalidate, daemon=True)
+        self._worker.start()
+
+    def _revalidate(self):
+        # Refresh the pending names in batches until there are none left
+        try:
+            while True:
+                time.sleep(self.batch_delay)
+                with self._lock:
+                    names, self._pending = self._pending, set()
+                    if not names:
+                        self._worker = None
+                        return
+                    self._refreshing = names
+                self.fetch(names)
+                with self._lock:
+                    self._refreshing = set()
+        except BaseException:
+            with self._lock:
+                self._pending.update(self._refreshing)
+                self._refreshing = set()
+                self._worker = None
+            raise
+
+    def __getitem__(self, name):
+        entry = self._quotes.get(name)
+        if entry is not None:
+            price, fetched = entry
+            age = self.clock() - fetched
+            if age <= self.ttl:
+                return price
+            if self.max_stale is None or age <= self.max_stale:
+                self._schedule(name)
+                return price
+        self.fetch([name])
+        return self._quotes[name][0]
+
+    def __contains__(self, name):
+        try:
+            self[name]
+            return True
+        except KeyError:
+            return False
+
+    def close(self):
+        self.pool.close()
+
+def test_pricemap():
+    import ex1
+    from quoteserver import QuoteServer
+
+    server = QuoteServer(report.read_prices('prices.csv')).start()
+    now = [0.0]
+    try:
+        portfolio = ex1.Portfolio.from_csv('portfolio.csv')
+        prices = PriceMap.for_portfolio(portfolio, *server.address, ttl=10, clock=lambda: now[0])
+        assert server.requests == 1                # One batched request
+        assert prices['IBM'] == 106.28
+        assert server.requests == 1                # Served from cache
+
+        # A stale quote is returned at once and refreshed in the background
+        server.prices = dict(server.prices, IBM=110.0)
+        now[0] = 20.0
+        assert prices['IBM'] == 106.28
+        for _ in range(100):
+            if prices._quotes['IBM'][0] == 110.0:
+                break
+            time.sleep(0.01)
+        assert prices['IBM'] == 110.0
+        assert server.requests == 2
+
+        # Many stale quotes are refreshed together in one request
+        now[0] = 40.0
+        names = {h.name for h in portfolio}
+        for name in names:
+            prices[name]
+        for _ in range(100):
+            if prices._worker is None and all(prices._quotes[name][1] == 40.0 for name in names):
+                break
+            time.sleep(0.01)
+        assert server.requests == 3
+        assert all(prices._quotes[name][1] == 40.0 for name in names)
+
+        # Unknown symbols
+        assert 'NOPE' not in prices
+        prices.close()
+    finally:
+        server.stop()
+
+    # A server that never answers: the timed out connections are closed,
+    # not kept in the pool
+    import socket
+    with socket.socket() as silent:
+        silent.bind(('127.0.0.1', 0))
+        silent.listen()
+        pool = ConnectionPool(*silent.getsockname(), timeout=0.05)
+        try:
+            pool.request('GET', '/', None, {})
+            assert False, "Expected TimeoutError"
+        except OSError:
+            pass
+        assert pool._idle.empty()
+    print('Good price map')
 
 def main():
-    import report
     import ex1
-    # Verify the mutability tests with a standard list
+    from quoteserver import QuoteServer
+    # A local quote server stands in for the online source
+    server = QuoteServer(report.read_prices('prices.csv')).start()
     portfolio = ex1.Portfolio.from_csv('portfolio.csv')
-    prices = PriceMap(...)     # must modify
+    prices = PriceMap.for_portfolio(portfolio, *server.address)
     report.print_report(portfolio, prices)
-    
+    prices.close()
+    server.stop()
+
 if __name__ == '__main__':
+    test_pricemap()
     main()
-    
-        
-        
-
-
-
-
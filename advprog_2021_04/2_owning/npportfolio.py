@@ -0,0 +1,162 @@
+# npportfolio.py
+#
+# A NumPy-only portfolio backend.
+#
+# PandasPortfolio (ex3.py) works, but importing pandas alone takes a
+# noticeable fraction of a second, which every run of a command line
+# tool has to pay.  NumpyPortfolio stores the holdings in a NumPy
+# structured array instead:
+#
+#     name (unicode), shares (int64), price (float64)
+#
+# The file is parsed by np.loadtxt().  cost(), value() and change()
+# are vectorized.  Prices are joined to
+# holdings with a PriceTable: the distinct names of the portfolio are
+# looked up with searchsorted() on the sorted price names, and the
+# result is gathered back out to every row.
+#
+# It's still a sequence of Holding objects, so report.print_report()
+# works with it unchanged.
+
+import csv
+
+import numpy as np
+
+from report import Holding
+
+class PriceTable:
+    def __init__(self, names, prices):
+        order = np.argsort(names)
+        self.names = np.asarray(names)[order]
+        self.prices = np.asarray(prices, dtype=np.float64)[order]
+
+    @classmethod
+    def from_mapping(cls, prices):
+        # Build from a dict (or anything with keys and __getitem__)
+        names = list(prices)
+        return cls(np.array(names, dtype=str), [prices[name] for name in names])
+
+    @classmethod
+    def from_csv(cls, filename):
+        with open(filename, "r") as file:
+            rows = [row for row in csv.reader(file) if row]
+        names, prices = zip(*rows)
+        return cls(np.array(names), np.array(prices, dtype=np.float64))
+
+    def lookup(self, names):
+        # Vectorized price lookup.  Raises KeyError for unknown names.
+        names = np.asarray(names)
+        index = np.searchsorted(self.names, names)
+        index[index == len(self.names)] = 0
+        missing = self.names[index] != names
+        if missing.any():
+            raise KeyError(names[missing][0])
+        return self.prices[index]
+
+    def __getitem__(self, name):
+        return float(self.lookup(np.array([name]))[0])
+
+    def __contains__(self, name):
+        try:
+            self[name]
+            return True
+        except KeyError:
+            return False
+
+    def __len__(self):
+        return len(self.names)
+
+def _as_price_table(prices):
+    return prices if isinstance(prices, PriceTable) else PriceTable.from_mapping(prices)
+
+def _dtype(width):
+    return np.dtype([('name', f'U{width}'), ('shares', np.int64), ('price', np.float64)])
+
+class NumpyPortfolio:
+    def __init__(self, data):
+        self.data = data
+        self._names = None          # Distinct names (sorted)
+        self._codes = None          # Index of each row's name in _names
+
+    @classmethod
+    def from_csv(cls, filename, width=16):
+        # np.loadtxt() parses the file in C, but it silently truncates
+        # strings to the width of the dtype.  If any name fills the
+        # whole field, it might have been cut short, so read it again
+        # with a wider field.
+        while True:
+            data = np.loadtxt(filename, delimiter=',', quotechar='"', skiprows=1,
+                              dtype=_dtype(width), ndmin=1)
+            longest = int(np.char.str_len(data['name']).max(initial=1))
+            if longest < width:
+                return cls(data.astype(_dtype(longest)))
+            width *= 2
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return type(self)(self.data[index])
+        name, shares, price = self.data[index].tolist()
+        return Holding(name, shares, price)
+
+    def __iter__(self):
+        for name, shares, price in self.data.tolist():
+            yield Holding(name, shares, price)
+
+    def _index(self):
+        # Sorting a million strings is the expensive part of a price
+        # lookup, so the distinct names are only worked out once.
+        if self._names is None:
+            self._names, self._codes = np.unique(self.data['name'], return_inverse=True)
+        return self._names, self._codes
+
+    def current_prices(self, prices):
+        # Price of every row. Each distinct name is only looked up once.
+        names, codes = self._index()
+        return _as_price_table(prices).lookup(names)[codes]
+
+    def cost(self):
+        return float(np.dot(self.data['shares'], self.data['price']))
+
+    def value(self, prices):
+        return float(np.dot(self.data['shares'], self.current_prices(prices)))
+
+    def change(self, prices):
+        # Per-row change in price, as in print_report()
+        return self.current_prices(prices) - self.data['price']
+
+def test_numpy_portfolio():
+    import io
+    from contextlib import redirect_stdout
+    import report
+
+    portfolio = NumpyPortfolio.from_csv('portfolio.csv')
+    prices = PriceTable.from_csv('prices.csv')
+    expected = report.read_portfolio('portfolio.csv')
+    assert [repr(h) for h in portfolio] == [repr(h) for h in expected]
+    assert repr(portfolio[1]) == "Holding('IBM', 50, 91.1)"
+    part = portfolio[1:3]
+    assert isinstance(part, NumpyPortfolio)
+    assert [repr(h) for h in part] == [repr(h) for h in expected[1:3]]
+    narrow = NumpyPortfolio.from_csv('portfolio.csv', width=2)
+    assert narrow.data.dtype == portfolio.data.dtype
+    assert narrow.data.tolist() == portfolio.data.tolist()
+    assert round(portfolio.cost(), 2) == 44671.15
+    assert round(portfolio.value(prices), 2) == 28686.10
+    assert round(portfolio.value(report.read_prices('prices.csv')), 2) == 28686.10
+    assert [round(c, 2) for c in portfolio.change(prices)][:2] == [-22.98, 15.18]
+    assert prices['IBM'] == 106.28
+    assert 'NOPE' not in prices
+
+    out1, out2 = io.StringIO(), io.StringIO()
+    with redirect_stdout(out1):
+        report.print_report(expected, report.read_prices('prices.csv'))
+    with redirect_stdout(out2):
+        report.print_report(portfolio, prices)
+    assert out1.getvalue() == out2.getvalue()
+    print('Good numpy portfolio')
+
+if __name__ == '__main__':
+    test_numpy_portfolio()
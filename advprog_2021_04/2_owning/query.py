@@ -0,0 +1,174 @@
+# query.py
+#
+# Aggregate queries over a portfolio.
+#
+# A portfolio usually holds several lots of the same stock (there are
+# two IBM rows in portfolio.csv, for instance).  print_report() can only
+# show them one row at a time.  A PortfolioIndex groups the holdings by
+# name and answers questions about the groups:
+#
+#    >>> index = PortfolioIndex(portfolio)
+#    >>> index.sum('shares', 'IBM')
+#    150
+#    >>> index.weighted_avg('price', by='shares', name='IBM')
+#    77.32666666666667
+#    >>> index.top_changes(prices, 2)
+#    [('IBM', 4343.0), ('AA', -2298.0000000000005)]
+#    >>>
+#
+# All of the per-group totals are worked out in a single pass when the
+# index is created.  After that, a query only touches the groups (or a
+# single group) instead of scanning every holding again.  The index
+# works with any portfolio that iterates as holdings.  The holdings are
+# stored as columns with the name replaced by an integer code, using
+# ex2.PortfolioColumns.  A PortfolioColumns is used directly, without
+# making a copy.
+
+import heapq
+
+from ex2 import PortfolioColumns
+
+class Group:
+    __slots__ = ('name', 'count', 'shares', 'cost')
+
+    def __init__(self, name, count, shares, cost):
+        self.name = name
+        self.count = count
+        self.shares = shares
+        self.cost = cost
+
+    @property
+    def avg_price(self):
+        return self.cost / self.shares if self.shares else 0.0
+
+    def __repr__(self):
+        return f'Group({self.name!r}, count={self.count}, shares={self.shares}, cost={self.cost:0.2f})'
+
+class PortfolioIndex:
+    def __init__(self, portfolio):
+        if not isinstance(portfolio, PortfolioColumns):
+            columns = PortfolioColumns()
+            for h in portfolio:
+                columns.append(h)
+            portfolio = columns
+        self.columns = portfolio
+        self._rows = None
+
+        # Name codes are small dense integers, so the running totals can
+        # be kept in lists indexed by code instead of a dict
+        ngroups = len(portfolio.categories)
+        count = [0] * ngroups
+        shares = [0] * ngroups
+        cost = [0.0] * ngroups
+        for code, s, p in zip(portfolio.name_codes, portfolio.shares, portfolio.price):
+            count[code] += 1
+            shares[code] += s
+            cost[code] += s * p
+        self.groups = {
+            name: Group(name, count[code], shares[code], cost[code])
+            for code, name in enumerate(portfolio.categories)
+        }
+
+    def __len__(self):
+        return len(self.groups)
+
+    def __contains__(self, name):
+        return name in self.groups
+
+    def group_by(self, field='name'):
+        if field != 'name':
+            raise ValueError(f'Holdings can only be grouped by name, not {field!r}')
+        return self.groups
+
+    def sum(self, field, name=None):
+        # Total of 'shares', 'cost' or 'count' for one name, or overall
+        if field not in Group.__slots__ or field == 'name':
+            raise ValueError(f'Unknown field {field!r}')
+        if name is not None:
+            return getattr(self.groups[name], field)
+        return sum(getattr(group, field) for group in self.groups.values())
+
+    def weighted_avg(self, field='price', by='shares', name=None):
+        # The only weighted average that can be formed from the columns
+        # is the average purchase price weighted by shares
+        if (field, by) != ('price', 'shares'):
+            raise ValueError(f'Unsupported weighted average of {field!r} by {by!r}')
+        if name is not None:
+            return self.groups[name].avg_price
+        shares = self.sum('shares')
+        return self.sum('cost') / shares if shares else 0.0
+
+    def value(self, prices, name=None):
+        if name is not None:
+            return self.groups[name].shares * prices[name]
+        return sum(group.shares * prices[group.name] for group in self.groups.values())
+
+    def changes(self, prices):
+        # Unrealized change (current value - cost) of every group
+        return {name: group.shares * prices[name] - group.cost
+                for name, group in self.groups.items()}
+
+    def top_changes(self, prices, n=10, largest=True):
+        # The n names with the largest (or smallest) unrealized change
+        pick = heapq.nlargest if largest else heapq.nsmallest
+        return pick(n, self.changes(prices).items(), key=lambda item: item[1])
+
+    def top_holdings(self, prices, n=10, largest=True):
+        # The n individual holdings with the largest (or smallest)
+        # unrealized change.  Prices are looked up once per name.
+        columns = self.columns
+        current = [prices[name] for name in columns.categories]
+        changes = ((s * (current[code] - p), i) for i, (code, s, p) in
+                   enumerate(zip(columns.name_codes, columns.shares, columns.price)))
+        pick = heapq.nlargest if largest else heapq.nsmallest
+        return [(columns[i], change) for change, i in pick(n, changes)]
+
+    def holdings(self, name):
+        # All holdings for one name.  The rows of every group are found
+        # with a counting sort the first time this is called.
+        if self._rows is None:
+            columns = self.columns
+            starts = [0] * (len(columns.categories) + 1)
+            for code, group in enumerate(self.groups.values()):
+                starts[code + 1] = starts[code] + group.count
+            rows = [0] * len(columns)
+            fill = starts[:-1]
+            for i, code in enumerate(columns.name_codes):
+                rows[fill[code]] = i
+                fill[code] += 1
+            self._rows = (starts, rows)
+        starts, rows = self._rows
+        code = self.columns._codes[name]
+        return [self.columns[i] for i in rows[starts[code]:starts[code + 1]]]
+
+def test_index():
+    import math
+    import report
+    portfolio = report.read_portfolio('portfolio.csv')
+    prices = report.read_prices('prices.csv')
+
+    for index in (PortfolioIndex(portfolio), PortfolioIndex(PortfolioColumns.from_csv('portfolio.csv'))):
+        groups = index.group_by('name')
+        assert list(groups) == ['AA', 'IBM', 'CAT', 'MSFT', 'GE']
+        assert groups['IBM'].count == 2 and groups['MSFT'].count == 2
+        assert index.sum('shares', 'IBM') == 150
+        assert index.sum('shares') == sum(h.shares for h in portfolio)
+        assert math.isclose(index.sum('cost'), 44671.15)
+        assert math.isclose(index.weighted_avg('price', by='shares', name='IBM'),
+                            (50 * 91.10 + 100 * 70.44) / 150)
+        assert math.isclose(index.value(prices), 28686.10)
+        assert [name for name, _ in index.top_changes(prices, 2)] == ['IBM', 'AA']
+        assert [name for name, _ in index.top_changes(prices, 1, largest=False)] == ['MSFT']
+        (h, change), = index.top_holdings(prices, 1)
+        assert (h.name, h.shares, h.price) == ('IBM', 100, 70.44)
+        assert math.isclose(change, 100 * (106.28 - 70.44))
+        assert [(h.shares, h.price) for h in index.holdings('MSFT')] == [(200, 51.23), (50, 65.1)]
+    try:
+        index.group_by('shares')
+        assert False, "Expected ValueError"
+    except ValueError:
+        pass
+    print('Good index')
+
+if __name__ == '__main__':
+    test_index()
@@ -0,0 +1,76 @@
+# quoteserver.py
+#
+# A local stand-in for an online stock quote service.  It exists so
+# that the PriceMap in ex4.py can be tested and benchmarked without a
+# network connection or a real API.
+#
+# The server speaks HTTP/1.1 with keep-alive and has one endpoint:
+#
+#     POST /quotes        body: JSON list of symbols
+#                         reply: JSON object {symbol: price}
+#
+# Unknown symbols are left out of the reply.  The number of requests
+# served is counted so that tests can check how many round trips a
+# client made.
+#
+#     shell % python quoteserver.py prices.csv 8000
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class QuoteHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes.  Without this, Nagle's
+    # algorithm and delayed ACKs add ~40ms to every kept-alive request.
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        if self.path != '/quotes':
+            self.send_error(404)
+            return
+        size = int(self.headers.get('Content-Length', 0))
+        symbols = json.loads(self.rfile.read(size))
+        prices = self.server.prices
+        quotes = {name: prices[name] for name in symbols if name in prices}
+        body = json.dumps(quotes).encode('utf-8')
+        with self.server.lock:
+            self.server.requests += 1
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class QuoteServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, prices, host='127.0.0.1', port=0):
+        super().__init__((host, port), QuoteHandler)
+        self.prices = prices          # Can be changed while running
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    @property
+    def address(self):
+        return self.server_address[:2]
+
+    def start(self):
+        # Serve from a background thread. Returns self for chaining
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+if __name__ == '__main__':
+    import sys
+    import report
+    server = QuoteServer(report.read_prices(sys.argv[1]), port=int(sys.argv[2]))
+    print('Serving quotes on', server.address)
+    server.serve_forever()
@@ -0,0 +1,208 @@
+# render.py
+#
+# Fast report output.
+#
+# print_report() calls print() for every holding.  Each call formats a
+# line, and if stdout is a terminal (line buffered), each line is
+# also a separate write() system call.  For a big portfolio, that is
+# more work than the arithmetic.
+#
+# render_report() produces the same report, but collects the formatted
+# lines in a buffer and writes them out in large blocks.  It can also
+# produce CSV or JSON lines instead of a table, and can stop showing
+# rows after the first `limit` (the summary still covers everything).
+# CSV output has no summary, so it is a single table that any CSV
+# reader can load:
+#
+#    >>> render_report(portfolio, prices)                    # Same as print_report()
+#    >>> render_report(portfolio, prices, format='csv', file=f)
+#    >>> render_report(portfolio, prices, format='jsonl', limit=10)
+#
+# Like stream.stream_report(), it makes a single pass over the
+# portfolio, so it works with an iterator of holdings too.
+
+import csv
+import json
+import sys
+from abc import ABC, abstractmethod
+
+class BlockWriter:
+    # Collects text and writes it to file in blocks of about blocksize
+    # characters.  The list of parts is reused between blocks.
+    def __init__(self, file, blocksize=65536):
+        self.file = file
+        self.blocksize = blocksize
+        self._parts = []
+        self._size = 0
+
+    def write(self, text):
+        self._parts.append(text)
+        self._size += len(text)
+        if self._size >= self.blocksize:
+            self.flush()
+
+    def flush(self):
+        if self._parts:
+            self.file.write(''.join(self._parts))
+            self._parts.clear()
+            self._size = 0
+        self.file.flush()
+
+class ReportFormat(ABC):
+    def __init__(self, out):
+        self.out = out
+
+    def headings(self):
+        pass
+
+    @abstractmethod
+    def row(self, name, shares, price, change):
+        pass
+
+    def more(self, count):
+        # Called with the number of rows left out by a limit
+        pass
+
+    @abstractmethod
+    def summary(self, cost, value):
+        pass
+
+class TableFormat(ReportFormat):
+    def headings(self):
+        self.out.write('{:10} {:10} {:10} {:10}\n'.format('Name', 'Shares', 'Price', 'Change'))
+        self.out.write(('-'*10 + ' ')*4 + '\n')
+
+    def row(self, name, shares, price, change):
+        # Same output as the f-string in print_report(), but % formatting
+        # with a constant format string is quite a bit cheaper
+        self.out.write('%10s %10s %10.2f %10.2f\n' % (name, shares, price, change))
+
+    def more(self, count):
+        self.out.write(f'... {count} more\n')
+
+    def summary(self, cost, value):
+        self.out.write('\nSummary:\n\n')
+        self.out.write(f'Initial cost: {cost:0.2f}\n')
+        self.out.write(f'Current value: {value:0.2f}\n')
+        self.out.write(f'Change: {value-cost:0.2f}\n')
+
+class CSVFormat(ReportFormat):
+    def __init__(self, out):
+        super().__init__(out)
+        self._names = { }           # name -> quoted name
+
+    def headings(self):
+        self.out.write('name,shares,price,change\n')
+
+    def row(self, name, shares, price, change):
+        # Names only need quoting if they contain a delimiter, quote or
+        # newline.  Each name is checked once.
+        quoted = self._names.get(name)
+        if quoted is None:
+            quoted = name
+            if any(c in name for c in ',"\r\n'):
+                quoted = '"' + name.replace('"', '""') + '"'
+            self._names[name] = quoted
+        self.out.write('%s,%s,%.2f,%.2f\n' % (quoted, shares, price, change))
+
+    def summary(self, cost, value):
+        # Left out, so that the output is one rectangular table
+        pass
+
+class JSONLinesFormat(ReportFormat):
+    def __init__(self, out):
+        super().__init__(out)
+        self._names = { }           # name -> JSON encoded name
+
+    def row(self, name, shares, price, change):
+        # There are far fewer names than rows, so each name is only
+        # encoded once
+        encoded = self._names.get(name)
+        if encoded is None:
+            encoded = self._names[name] = json.dumps(name)
+        self.out.write('{"name": %s, "shares": %d, "price": %.2f, "change": %.2f}\n'
+                       % (encoded, shares, price, change))
+
+    def summary(self, cost, value):
+        self.out.write('{"summary": {"cost": %.2f, "value": %.2f, "change": %.2f}}\n'
+                       % (cost, value, value - cost))
+
+FORMATS = {
+    'table': TableFormat,
+    'csv': CSVFormat,
+    'jsonl': JSONLinesFormat,
+}
+
+def render_report(portfolio, prices, file=None, format='table', limit=None,
+                  summary=True, blocksize=65536):
+    try:
+        formatter_cls = FORMATS[format]
+    except KeyError:
+        raise ValueError(f'Unknown format {format!r}') from None
+    out = BlockWriter(sys.stdout if file is None else file, blocksize)
+    formatter = formatter_cls(out)
+    formatter.headings()
+    row = formatter.row
+    cost = 0
+    value = 0
+    hidden = 0
+    remaining = -1 if limit is None else limit
+    for h in portfolio:
+        current_price = prices[h.name]
+        if remaining:
+            row(h.name, h.shares, current_price, current_price - h.price)
+            remaining -= 1
+        else:
+            hidden += 1
+        cost += h.shares * h.price
+        value += h.shares * current_price
+    if hidden:
+        formatter.more(hidden)
+    if summary:
+        formatter.summary(cost, value)
+    out.flush()
+
+def test_render():
+    import io
+    from contextlib import redirect_stdout
+    import report
+
+    portfolio = report.read_portfolio('portfolio.csv')
+    prices = report.read_prices('prices.csv')
+    expected = io.StringIO()
+    with redirect_stdout(expected):
+        report.print_report(portfolio, prices)
+    out = io.StringIO()
+    render_report(portfolio, prices, file=out, blocksize=10)
+    assert out.getvalue() == expected.getvalue()
+
+    # Only the first 2 rows, but the summary covers everything
+    out = io.StringIO()
+    render_report(iter(portfolio), prices, file=out, limit=2)
+    lines = out.getvalue().splitlines()
+    assert lines[2:5] == expected.getvalue().splitlines()[2:4] + ['... 5 more']
+    assert lines[-3:] == expected.getvalue().splitlines()[-3:]
+
+    out = io.StringIO()
+    render_report(portfolio, prices, file=out, format='csv')
+    rows = list(csv.reader(io.StringIO(out.getvalue())))
+    assert rows[0] == ['name', 'shares', 'price', 'change']
+    assert rows[2] == ['IBM', '50', '106.28', '15.18']
+    assert len(rows) == len(portfolio) + 1 and all(len(r) == 4 for r in rows)
+
+    out = io.StringIO()
+    render_report([report.Holding('A, "B"', 1, 2.0)], {'A, "B"': 3.0}, file=out,
+                  format='csv', summary=False)
+    assert list(csv.reader(io.StringIO(out.getvalue())))[1] == ['A, "B"', '1', '3.00', '1.00']
+
+    out = io.StringIO()
+    render_report(portfolio, prices, file=out, format='jsonl', limit=1)
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert records == [
+        {'name': 'AA', 'shares': 100, 'price': 9.22, 'change': -22.98},
+        {'summary': {'cost': 44671.15, 'value': 28686.1, 'change': -15985.05}},
+    ]
+    print('Good rendering')
+
+if __name__ == '__main__':
+    test_render()
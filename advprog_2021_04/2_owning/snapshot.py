@@ -0,0 +1,184 @@
+# snapshot.py
+#
+# A binary snapshot format for portfolios.
+#
+# Most of the time spent loading portfolio.csv goes into csv.reader and
+# the int()/float() conversions of every row.  A snapshot stores the
+# same data in a form that can be used directly from the file, with no
+# parsing at all:
+#
+#     header     magic b'PFS1', record count, string table offset,
+#                string count (32 bytes)
+#     records    one fixed-width record per holding (24 bytes):
+#                shares (int64), price (float64), name code (uint32)
+#     strings    the distinct names, each as a uint16 length followed
+#                by UTF-8 bytes.  Name codes index into this table.
+#
+# Everything is little-endian.  SnapshotPortfolio opens a snapshot with
+# mmap.  The shares, price and name-code fields are exposed as strided
+# memoryviews over the records, so opening takes the same time whatever
+# the file size, and nothing is copied until a value is read.  Only the
+# small string table is decoded up front.
+#
+#     shell % python snapshot.py portfolio.csv portfolio.snap
+#
+#    >>> portfolio = SnapshotPortfolio.open('portfolio.snap')
+#    >>> report.print_report(portfolio, prices)
+
+import mmap
+import struct
+import sys
+
+from ex2 import HoldingView, PortfolioColumns
+
+MAGIC = b'PFS1'
+HEADER = struct.Struct('<4s4xQQI4x')
+RECORD = struct.Struct('<qdI4x')
+STRLEN = struct.Struct('<H')
+
+def write_snapshot(portfolio, filename):
+    # Write any portfolio (a sequence of objects with name, shares and
+    # price attributes) as a snapshot file
+    if not isinstance(portfolio, PortfolioColumns):
+        columns = PortfolioColumns()
+        for h in portfolio:
+            columns.append(h)
+        portfolio = columns
+
+    count = len(portfolio)
+    records = bytearray(RECORD.size * count)
+    for i, (shares, price, code) in enumerate(zip(portfolio.shares, portfolio.price,
+                                                  portfolio.name_codes)):
+        RECORD.pack_into(records, i * RECORD.size, shares, price, code)
+
+    strings = bytearray()
+    for name in portfolio.categories:
+        raw = name.encode('utf-8')
+        strings += STRLEN.pack(len(raw)) + raw
+
+    with open(filename, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, count, HEADER.size + len(records), len(portfolio.categories)))
+        file.write(records)
+        file.write(strings)
+
+def csv_to_snapshot(csvfile, snapfile):
+    write_snapshot(PortfolioColumns.from_csv(csvfile), snapfile)
+
+class SnapshotPortfolio:
+    # Presents the same interface as PortfolioColumns (and can be used
+    # with the same HoldingView rows) but reads directly from the file
+
+    def __init__(self, buffer, close=None):
+        if sys.byteorder != 'little':
+            raise RuntimeError('Snapshots can only be mapped on little-endian machines')
+        self._buffer = memoryview(buffer)
+        self._close = close
+        magic, count, strings_offset, nstrings = HEADER.unpack_from(self._buffer, 0)
+        if magic != MAGIC:
+            raise ValueError('Not a portfolio snapshot')
+
+        # The 24-byte records viewed as 8-byte and 4-byte words
+        records = self._buffer[HEADER.size:strings_offset]
+        words = RECORD.size // 8
+        self._views = [records.cast('q'), records.cast('d'), records.cast('I')]
+        self.shares = self._views[0][0::words]
+        self.price = self._views[1][1::words]
+        self.name_codes = self._views[2][4::words * 2]
+        self._count = count
+
+        self.categories = []
+        offset = strings_offset
+        for _ in range(nstrings):
+            size, = STRLEN.unpack_from(self._buffer, offset)
+            offset += STRLEN.size
+            self.categories.append(str(self._buffer[offset:offset + size], 'utf-8'))
+            offset += size
+
+    @classmethod
+    def open(cls, filename):
+        with open(filename, 'rb') as file:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(mapped, close=mapped.close)
+
+    def close(self):
+        # All views must be released before the mmap can be closed
+        for view in (self.shares, self.price, self.name_codes, *self._views, self._buffer):
+            view.release()
+        if self._close:
+            self._close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return self._count
+
+    def _slice(self, index):
+        # A SnapshotPortfolio over part of the same mapped file.  It has
+        # views of its own, so it can be closed separately, but it must
+        # be closed before the portfolio it came from.
+        part = type(self).__new__(type(self))
+        part._buffer = self._buffer[:]
+        part._close = None
+        part._views = []
+        part.shares = self.shares[index]
+        part.price = self.price[index]
+        part.name_codes = self.name_codes[index]
+        part._count = len(part.shares)
+        part.categories = self.categories
+        return part
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._slice(index)
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('portfolio index out of range')
+        return HoldingView(self, index)
+
+    def __iter__(self):
+        for index in range(self._count):
+            yield HoldingView(self, index)
+
+def test_snapshot():
+    import io
+    import os
+    import tempfile
+    from contextlib import redirect_stdout
+    import report
+
+    prices = report.read_prices('prices.csv')
+
+    def render(portfolio):
+        out = io.StringIO()
+        with redirect_stdout(out):
+            report.print_report(portfolio, prices)
+        return out.getvalue()
+
+    expected = render(report.read_portfolio('portfolio.csv'))
+    with tempfile.TemporaryDirectory() as tmpdir:
+        snapfile = os.path.join(tmpdir, 'portfolio.snap')
+        csv_to_snapshot('portfolio.csv', snapfile)
+        with SnapshotPortfolio.open(snapfile) as portfolio:
+            assert len(portfolio) == 7
+            assert render(portfolio) == expected
+            assert portfolio[-1].name == 'IBM'
+            with portfolio[1:3] as part:
+                assert isinstance(part, SnapshotPortfolio)
+                assert [repr(h) for h in part] == [repr(h) for h in portfolio][1:3]
+
+        # Any portfolio can be written, not just PortfolioColumns
+        write_snapshot(report.read_portfolio('portfolio.csv'), snapfile)
+        with SnapshotPortfolio.open(snapfile) as portfolio:
+            assert render(portfolio) == expected
+    print('Good snapshot')
+
+if __name__ == '__main__':
+    if len(sys.argv) == 3:
+        csv_to_snapshot(sys.argv[1], sys.argv[2])
+    else:
+        test_snapshot()
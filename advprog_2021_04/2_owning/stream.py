@@ -0,0 +1,96 @@
+# stream.py
+#
+# Streaming versions of the functions in report.py.
+#
+# read_portfolio() and read_prices() load an entire file into memory
+# before anything else happens.  For very large position files that
+# may not even be possible.  The functions here read a file
+# incrementally instead.  Rows are parsed into Holding instances and
+# handed out in fixed-size batches, so no more than one batch is ever
+# held in memory at a time.
+#
+#    >>> for batch in iter_portfolio_batches('portfolio.csv', 1000):
+#    ...     for h in batch:
+#    ...         ...
+#
+# stream_report() produces exactly the same output as print_report(),
+# but computes the cost/value summary in the same pass that prints the
+# rows.  Given iter_portfolio(filename) it never materializes the
+# portfolio at all.
+
+import csv
+import sys
+from itertools import islice
+
+from report import Holding
+
+def iter_portfolio_batches(filename, batchsize=10_000):
+    with open(filename, "r") as file:
+        rows = csv.reader(file)
+        next(rows)
+        while True:
+            batch = [Holding(row[0], int(row[1]), float(row[2]))
+                     for row in islice(rows, batchsize)]
+            if not batch:
+                return
+            yield batch
+
+def iter_portfolio(filename, batchsize=10_000):
+    for batch in iter_portfolio_batches(filename, batchsize):
+        yield from batch
+
+def iter_price_batches(filename, batchsize=10_000):
+    with open(filename, "r") as file:
+        rows = csv.reader(file)
+        while True:
+            batch = [(row[0], float(row[1])) for row in islice(rows, batchsize)]
+            if not batch:
+                return
+            yield batch
+
+def read_prices(filename, batchsize=10_000):
+    # Same result as report.read_prices(), built up one batch at a time
+    prices = { }
+    for batch in iter_price_batches(filename, batchsize):
+        prices.update(batch)
+    return prices
+
+def stream_report(portfolio, prices, file=None):
+    file = sys.stdout if file is None else file
+    print('{:10} {:10} {:10} {:10}'.format('Name', 'Shares', 'Price', 'Change'), file=file)
+    print(('-'*10 + ' ')*4, file=file)
+    cost = 0
+    value = 0
+    for h in portfolio:
+        current_price = prices[h.name]
+        change = current_price - h.price
+        print(f'{h.name:>10} {h.shares:>10} {current_price:>10.2f} {change:>10.2f}', file=file)
+        cost += h.shares * h.price
+        value += h.shares * current_price
+    print('\nSummary:\n', file=file)
+    print(f'Initial cost: {cost:0.2f}', file=file)
+    print(f'Current value: {value:0.2f}', file=file)
+    print(f'Change: {value-cost:0.2f}', file=file)
+
+def test_stream():
+    import io
+    from contextlib import redirect_stdout
+    import report
+
+    expected = report.read_portfolio('portfolio.csv')
+    batches = list(iter_portfolio_batches('portfolio.csv', 3))
+    assert [len(b) for b in batches] == [3, 3, 1]
+    assert [repr(h) for b in batches for h in b] == [repr(h) for h in expected]
+    assert read_prices('prices.csv', 7) == report.read_prices('prices.csv')
+
+    prices = read_prices('prices.csv')
+    out1 = io.StringIO()
+    with redirect_stdout(out1):
+        report.print_report(expected, prices)
+    out2 = io.StringIO()
+    stream_report(iter_portfolio('portfolio.csv', 2), prices, file=out2)
+    assert out1.getvalue() == out2.getvalue()
+    print('Good streaming')
+
+if __name__ == '__main__':
+    test_stream()
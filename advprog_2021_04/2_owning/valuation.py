@@ -0,0 +1,109 @@
+# valuation.py
+#
+# Incremental mark-to-market.
+#
+# print_report() recomputes the cost and value of the whole portfolio
+# with two full passes every time it runs.  That's fine for a report
+# run once a day, but not if prices are ticking live.  A Valuation
+# indexes the holdings by symbol once and keeps running totals.  When
+# a single price changes, only that symbol's totals are touched:
+#
+#    >>> v = Valuation(portfolio, prices)
+#    >>> v.value
+#    28686.1
+#    >>> v.update('IBM', 110.0)        # A price tick
+#    >>> v.value
+#    29244.1
+#    >>> v.change('IBM')
+#    ...
+#
+# A Valuation also works as a price map, so it can be passed straight
+# to report.print_report().
+#
+# Floating point totals that are updated incrementally can slowly
+# drift from a from-scratch sum.  refresh() recomputes everything
+# exactly and can be called every so often if that matters.
+
+import math
+
+class SymbolTotals:
+    __slots__ = ('shares', 'cost', 'value', 'holdings')
+
+    def __init__(self):
+        self.shares = 0
+        self.cost = 0.0
+        self.value = 0.0
+        self.holdings = []
+
+class Valuation:
+    def __init__(self, portfolio, prices):
+        self.prices = { }
+        self.symbols = { }
+        for h in portfolio:
+            totals = self.symbols.get(h.name)
+            if totals is None:
+                totals = self.symbols[h.name] = SymbolTotals()
+                self.prices[h.name] = prices[h.name]
+            totals.shares += h.shares
+            totals.holdings.append(h)
+        self.refresh()
+
+    def refresh(self):
+        for name, totals in self.symbols.items():
+            totals.cost = math.fsum(h.shares * h.price for h in totals.holdings)
+            totals.value = totals.shares * self.prices[name]
+        self.cost = math.fsum(t.cost for t in self.symbols.values())
+        self.value = math.fsum(t.value for t in self.symbols.values())
+
+    def update(self, name, price):
+        totals = self.symbols.get(name)
+        if totals is None:
+            return                     # Not a symbol that we hold
+        self.prices[name] = price
+        value = totals.shares * price
+        self.value += value - totals.value
+        totals.value = value
+
+    def change(self, name=None):
+        if name is None:
+            return self.value - self.cost
+        totals = self.symbols[name]
+        return totals.value - totals.cost
+
+    def holding_changes(self, name):
+        # Per-holding change for one symbol (current price - purchase price)
+        price = self.prices[name]
+        return [(h, price - h.price) for h in self.symbols[name].holdings]
+
+    # Price map interface so that report.print_report() can be used
+    def __getitem__(self, name):
+        return self.prices[name]
+
+    def __contains__(self, name):
+        return name in self.prices
+
+    def print_summary(self):
+        print('\nSummary:\n')
+        print(f'Initial cost: {self.cost:0.2f}')
+        print(f'Current value: {self.value:0.2f}')
+        print(f'Change: {self.value-self.cost:0.2f}')
+
+def test_valuation():
+    import report
+    portfolio = report.read_portfolio('portfolio.csv')
+    prices = report.read_prices('prices.csv')
+    v = Valuation(portfolio, prices)
+    assert round(v.cost, 2) == 44671.15
+    assert round(v.value, 2) == 28686.10
+
+    v.update('IBM', 110.0)
+    v.update('XOM', 1.0)          # Not held, ignored
+    prices['IBM'] = 110.0
+    assert math.isclose(v.value, sum(h.shares * prices[h.name] for h in portfolio))
+    assert math.isclose(v.change('IBM'), 150 * 110.0 - (50 * 91.10 + 100 * 70.44))
+    assert [round(c, 2) for _, c in v.holding_changes('IBM')] == [18.9, 39.56]
+    assert v['IBM'] == 110.0
+    print('Good valuation')
+
+if __name__ == '__main__':
+    test_valuation()
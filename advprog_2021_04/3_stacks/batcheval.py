@@ -0,0 +1,62 @@
+# batcheval.py
+#
+# Run one StackMachine program over many rows of inputs at once.
+#
+# Evaluating a program for a million different values of its variables
+# means a million calls to StackMachine.run(), and every instruction
+# is dispatched a million times.  Nothing about the Calculator or the
+# stacks actually requires the items to be numbers, though.  If each
+# variable is a NumPy array holding a whole column of inputs, every
+# stack slot holds an array.  Each add/sub/mul/div then works on
+# the whole batch, and each instruction is dispatched just once:
+#
+#    >>> program = compile_expression('(x + y) * (x - y)')
+#    >>> run_batch(program, {'x': [1, 2, 3], 'y': [1, 1, 1]})
+#    array([0., 3., 8.])
+#    >>>
+#
+# The columns are converted to float64 arrays, and constants are
+# broadcast, so the result always has one value per row.  Division
+# by zero doesn't raise ZeroDivisionError like it does for a single
+# row.  The rows where it happens come out as inf or nan instead.
+
+import numpy as np
+
+from stacks import Stack, StackMachine
+
+def run_batch(instructions, columns, stack=Stack):
+    arrays = {name: np.asarray(values, dtype=np.float64) for name, values in columns.items()}
+    lengths = {len(a) for a in arrays.values()}
+    if len(lengths) > 1:
+        raise ValueError('All columns must have the same length')
+    rows = lengths.pop() if lengths else 1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result = StackMachine(stack).run(instructions, arrays)
+    return np.broadcast_to(np.asarray(result, dtype=np.float64), (rows,)).copy()
+
+def test_batch():
+    from exprcompile import compile_expression
+    from stacks import VersionedStack
+
+    program = compile_expression('(x + y) * (x - y) / 2 + 1')
+    x = [1, 2, 3, 4.5]
+    y = [1, 1, 2, -3]
+    expected = [StackMachine().run(program, {'x': a, 'y': b}) for a, b in zip(x, y)]
+    assert run_batch(program, {'x': x, 'y': y}).tolist() == expected
+    assert run_batch(program, {'x': x, 'y': y}, VersionedStack).tolist() == expected
+
+    # A result that doesn't depend on the inputs still gives one per row
+    assert run_batch([('push', 2)], {'x': x}).tolist() == [2.0] * 4
+    assert run_batch([('push', 2)], {}).tolist() == [2.0]
+
+    result = run_batch([('push', 1), ('load', 'x'), ('div',)], {'x': [2, 0]})
+    assert result[0] == 0.5 and np.isinf(result[1])
+    try:
+        run_batch(program, {'x': [1, 2], 'y': [1]})
+        assert False, "Expected ValueError"
+    except ValueError:
+        pass
+    print('Good batches')
+
+if __name__ == '__main__':
+    test_batch()
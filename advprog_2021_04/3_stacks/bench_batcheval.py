@@ -0,0 +1,62 @@
+# bench_batcheval.py
+#
+# Cost per row of evaluating one program over many rows of inputs:
+#
+#   - StackMachine.run() once per row (scalars)
+#   - the compiled function from stackcompile.py once per row
+#   - batcheval.run_batch(), with one NumPy array per variable
+#
+# Running the per-row versions on millions of rows takes a long time,
+# so they are timed on a sample and reported per row.
+#
+#     shell % python bench_batcheval.py [rows]
+
+import sys
+import time
+
+import numpy as np
+
+from batcheval import run_batch
+from exprcompile import compile_expression
+from stackcompile import compile_program
+from stacks import StackMachine
+
+SOURCE = '(x + y) * (x - y) / (x * x + 1) + 3 * (x - 2 * y) / (y * y + 2)'
+SAMPLE = 20_000
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+def per_row(program, x, y):
+    machine_run = StackMachine().run
+    return [machine_run(program, {'x': a, 'y': b}) for a, b in zip(x, y)]
+
+def per_row_compiled(program, x, y):
+    func = compile_program(program)
+    return [func({'x': a, 'y': b}) for a, b in zip(x, y)]
+
+def main(rows=1_000_000):
+    program = compile_expression(SOURCE)
+    print(f'{SOURCE}')
+    print(f'{len(program)} instructions, {rows} rows')
+    rng = np.random.default_rng(1)
+    x = rng.uniform(-10, 10, rows)
+    y = rng.uniform(-10, 10, rows)
+    sx, sy = x[:SAMPLE].tolist(), y[:SAMPLE].tolist()
+
+    expected, itime = timed(per_row, program, sx, sy)
+    compiled, ctime = timed(per_row_compiled, program, sx, sy)
+    result, btime = timed(run_batch, program, {'x': x, 'y': y})
+    assert compiled == expected
+    assert np.allclose(result[:SAMPLE], expected, rtol=1e-12, atol=0)
+
+    print(f'{"":<22} {"ns/row":>10} {"total for all rows (s)":>24}')
+    for label, t, n in [('StackMachine per row', itime, SAMPLE),
+                        ('compiled per row', ctime, SAMPLE),
+                        ('run_batch (NumPy)', btime, rows)]:
+        print(f'{label:<22} {t / n * 1e9:>10.1f} {t / n * rows:>24.3f}')
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,62 @@
+# bench_compile.py
+#
+# Run the same long StackMachine program many times with the
+# interpreter (StackMachine.run) and with the compiler in
+# stackcompile.py.  The compile time is shown separately.  After the
+# first call, it's paid again only if the program drops out of the cache.
+#
+#     shell % python bench_compile.py [instructions] [runs]
+
+import random
+import sys
+import time
+
+import stackcompile
+import stacks
+
+def make_program(length, seed=1, maxdepth=8):
+    # A random but valid arithmetic program.  Values stay in [1, 2] and
+    # the operators are mixed so that the numbers don't blow up.
+    rng = random.Random(seed)
+    program = []
+    depth = 0
+    while len(program) < length - 1 or depth > 1:
+        if depth < 2 or (depth < maxdepth and rng.random() < 0.5 and len(program) < length - depth):
+            program.append(('push', round(rng.uniform(1, 2), 3)))
+            depth += 1
+        else:
+            program.append((rng.choice(['add', 'sub', 'mul', 'div']),))
+            depth -= 1
+    return program
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+def interpret(program, runs):
+    for _ in range(runs):
+        result = stacks.StackMachine().run(program)
+    return result
+
+def run_compiled(program, runs):
+    for _ in range(runs):
+        result = stackcompile.compile_program(program)()
+    return result
+
+def main(length=10_000, runs=100):
+    program = make_program(length)
+    print(f'{len(program)} instructions, {runs} runs')
+    expected, itime = timed(interpret, program, runs)
+    compiled, ctime = timed(stackcompile.compile_program, program)
+    result, rtime = timed(run_compiled, program, runs)
+    assert repr(result) == repr(expected)
+    print(f'interpreter:   {itime / runs * 1e3:8.3f} ms/run')
+    print(f'compile once:  {ctime * 1e3:8.3f} ms')
+    print(f'compiled:      {rtime / runs * 1e3:8.3f} ms/run  ({itime / rtime:.1f}x faster)')
+    _, ftime = timed(lambda: [compiled() for _ in range(runs)])
+    print(f'  of which the call itself: {ftime / runs * 1e3:.3f} ms (the rest is the cache lookup)')
+    print(f'break even after {ctime / (itime - rtime) * runs:.1f} runs')
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,97 @@
+# bench_exprcompile.py
+#
+# Instruction counts and run times for expressions compiled with
+# exprcompile.compile_expression() using different optimizations.
+# Two corpora of deeply nested expressions are used:
+#
+#   chain     - like the one in parse_challenge(), 1 + (2 * (3 - ...))
+#   repeated  - each level uses the previous level twice, as in
+#               (E) * ((E) - 3), so there are common subexpressions
+#
+# The expressions are all constants, so folding alone reduces each of
+# them to a single push.  The "no fold" columns show what CSE and
+# the peephole pass manage on their own.
+#
+#     shell % python bench_exprcompile.py [count] [depth]
+
+import random
+import sys
+import time
+
+from exprcompile import compile_expression
+from stacks import StackMachine
+
+OPS = ['+', '-', '*', '/']
+
+def chain_expression(rng, depth):
+    expr = str(rng.randint(1, 9))
+    for _ in range(depth):
+        expr = f'{rng.randint(1, 9)} {rng.choice(OPS)} ({expr})'
+    return expr
+
+def repeated_expression(rng, depth):
+    expr = f'{rng.randint(1, 9)} {rng.choice(OPS)} {rng.randint(1, 9)}'
+    for _ in range(depth):
+        k = rng.randint(2, 9)
+        # Keep the values from growing: mostly add/sub with the repeat
+        if rng.random() < 0.5:
+            expr = f'({expr}) {rng.choice("+-")} ({expr})'
+        else:
+            expr = f'({expr}) {rng.choice("+-")} (({expr}) / {k})'
+    return expr
+
+def make_corpus(generate, rng, count, depth):
+    # Skip expressions that happen to divide by zero
+    sources = []
+    while len(sources) < count:
+        source = generate(rng, depth)
+        try:
+            eval(source)
+        except ZeroDivisionError:
+            continue
+        sources.append(source)
+    return sources
+
+CONFIGS = [
+    ('naive', dict(fold=False, cse=False, peephole=False)),
+    ('peephole', dict(fold=False, cse=False, peephole=True)),
+    ('cse', dict(fold=False, cse=True, peephole=False)),
+    ('cse+peephole', dict(fold=False, cse=True, peephole=True)),
+    ('all (fold)', dict(fold=True, cse=True, peephole=True)),
+]
+
+def run_all(programs):
+    start = time.perf_counter()
+    results = [StackMachine().run(program) for program in programs]
+    return results, time.perf_counter() - start
+
+def main(count=200, depth=10):
+    rng = random.Random(1)
+    corpora = {
+        'chain': make_corpus(chain_expression, rng, count, depth * 3),
+        'repeated': make_corpus(repeated_expression, rng, count, depth),
+    }
+    for name, sources in corpora.items():
+        print(f'{name}: {count} expressions, {sum(map(len, sources)) / count:.0f} characters each')
+        print(f'  {"":<14} {"instructions":>13} {"reduction":>10} {"run (ms)":>10} {"compile (ms)":>13}')
+        expected = [eval(source) for source in sources]
+        baseline = None
+        for label, options in CONFIGS:
+            compile_expression.cache_clear()
+            start = time.perf_counter()
+            programs = [compile_expression(source, **options) for source in sources]
+            ctime = time.perf_counter() - start
+            results, rtime = run_all(programs)
+            assert results == expected
+            total = sum(map(len, programs))
+            baseline = baseline or total
+            print(f'  {label:<14} {total:>13} {1 - total / baseline:>9.0%} '
+                  f'{rtime * 1e3:>10.2f} {ctime * 1e3:>13.2f}')
+        start = time.perf_counter()
+        for source in sources:
+            compile_expression(source, **options)
+        print(f'  cached compile: {(time.perf_counter() - start) / count * 1e6:.2f} us per expression')
+        print()
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
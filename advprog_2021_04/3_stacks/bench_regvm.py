@@ -0,0 +1,66 @@
+# bench_regvm.py
+#
+# Long arithmetic programs on the stack machine (StackMachine) and on
+# the register machine (regvm.RegisterMachine).  Dispatches counts the
+# instructions each machine executes.  Stack ops counts the push() and
+# pop() calls that StackMachine makes on its stack; the register
+# machine makes none.  Registers shows how many registers hold
+# constants and how many are needed for intermediate results.  The
+# "direct" row calls the translated program itself, skipping the cache
+# lookup that RegisterMachine.run() does on every call.
+#
+#     shell % python bench_regvm.py [instructions] [runs]
+
+import sys
+import time
+
+import regvm
+import stacks
+from bench_compile import make_program
+
+STACK_OPS = {'push': 1, 'load': 1, 'add': 3, 'sub': 3, 'mul': 3, 'div': 3, 'dup': 3, 'swap': 4}
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+def run_stack(program, runs):
+    for _ in range(runs):
+        result = stacks.StackMachine().run(program)
+    return result
+
+def run_register(program, runs):
+    for _ in range(runs):
+        result = regvm.RegisterMachine().run(program)
+    return result
+
+def run_translated(translated, runs):
+    for _ in range(runs):
+        result = translated.run()
+    return result
+
+def main(length=10_000, runs=20):
+    print(f'{"instructions":>12} {"machine":<10} {"dispatches":>11} {"stack ops":>10} '
+          f'{"registers":>14} {"ms/run":>9}')
+    size = 100
+    while size <= length:
+        program = make_program(size)
+        translated, ttime = timed(regvm.translate, program)
+        expected, stime = timed(run_stack, program, runs)
+        result, rtime = timed(run_register, program, runs)
+        _, xtime = timed(run_translated, translated, runs)
+        assert repr(result) == repr(expected)
+        stack_ops = sum(STACK_OPS[op[0]] for op in program) + 1
+        print(f'{len(program):>12} {"stack":<10} {len(program):>11} {stack_ops:>10} '
+              f'{"-":>14} {stime / runs * 1e3:>9.3f}')
+        temps = translated.nregs - len(translated.consts)
+        registers = f'{len(translated.consts)} + {temps}'
+        print(f'{"":>12} {"register":<10} {len(translated):>11} {0:>10} '
+              f'{registers:>14} {rtime / runs * 1e3:>9.3f}')
+        print(f'{"":>12} {"  direct":<10} {"":>11} {"":>10} {"":>14} {xtime / runs * 1e3:>9.3f}'
+              f'   (translate once: {ttime * 1e3:.3f} ms)')
+        size *= 10
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
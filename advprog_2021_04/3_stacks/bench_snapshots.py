@@ -0,0 +1,79 @@
+# bench_snapshots.py
+#
+# Memory and time used by stack snapshots.  A stack holding `depth`
+# items is modified (one pop and one push) and then snapshotted, over
+# and over.  VersionedStack snapshots share all of their unchanged
+# cells, so each one should only cost the single new cell.  Copying a
+# list-based Stack costs the whole stack every time.  The list copies
+# use fewer snapshots so they fit in memory, and the results are shown
+# per snapshot.
+#
+#     shell % python bench_snapshots.py [snapshots] [depth]
+
+import sys
+import time
+import tracemalloc
+
+import stacks
+
+def versioned_snapshots(count, depth):
+    s = stacks.VersionedStack()
+    for i in range(depth):
+        s.push(float(i))
+    snapshots = []
+    for i in range(count):
+        s.pop()
+        s.push(float(i))
+        snapshots.append(s.snapshot())
+    return snapshots
+
+def copied_snapshots(count, depth):
+    s = stacks.Stack()
+    for i in range(depth):
+        s.push(float(i))
+    snapshots = []
+    for i in range(count):
+        s.pop()
+        s.push(float(i))
+        snapshots.append(list(s.stack))
+    return snapshots
+
+def measure(func, count, depth):
+    tracemalloc.start()
+    start = time.perf_counter()
+    snapshots = func(count, depth)
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return snapshots, size, elapsed
+
+def main(count=1_000_000, depth=100):
+    print(f'{"":<18} {"snapshots":>10} {"total (MB)":>11} {"bytes/snapshot":>15} {"us/snapshot":>12}')
+    snapshots, size, elapsed = measure(versioned_snapshots, count, depth)
+    print(f'{"VersionedStack":<18} {count:>10} {size / 2**20:>11.1f} {size / count:>15.1f} '
+          f'{elapsed / count * 1e6:>12.3f}')
+
+    # Every snapshot is a new top cell on the same shared rest of the stack
+    rest = snapshots[0].pop()[1]
+    assert all(snap.pop()[1] is rest for snap in snapshots)
+    assert all(len(snap) == depth for snap in snapshots)
+    del snapshots
+
+    copies = max(1, count // 20)
+    snapshots, size, elapsed = measure(copied_snapshots, copies, depth)
+    print(f'{"Stack + list copy":<18} {copies:>10} {size / 2**20:>11.1f} {size / copies:>15.1f} '
+          f'{elapsed / copies * 1e6:>12.3f}')
+    print(f'{count} list copies would need about {size / copies * count / 2**30:.1f} GB')
+
+    # Restoring is just as cheap: backtrack through every snapshot
+    s = stacks.VersionedStack()
+    snapshots = versioned_snapshots(count, depth)
+    start = time.perf_counter()
+    for snap in reversed(snapshots):
+        s.restore(snap)
+        s.pop()
+    elapsed = time.perf_counter() - start
+    print(f'restore + pop: {elapsed / count * 1e6:.3f} us')
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,84 @@
+# bench_stacks.py
+#
+# Push/pop throughput of the stack implementations in stacks.py, one
+# item at a time and (for ArrayStack) in batches with push_many() and
+# pop_many().  Also shows the memory used per item and the speed of
+# the Calculator on top of each stack (millions of multiply-adds per
+# second).
+#
+#     shell % python bench_stacks.py [items]
+
+import sys
+import time
+import tracemalloc
+
+import stacks
+
+STACKS = [stacks.Stack, stacks.ImmutableStack, stacks.NumericStack,
+          stacks.ArrayStack, stacks.IntArrayStack]
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+def push_pop(cls, items):
+    s = cls()
+    push = s.push
+    pop = s.pop
+    start = time.perf_counter()
+    for x in items:
+        push(x)
+    mid = time.perf_counter()
+    for _ in items:
+        pop()
+    return mid - start, time.perf_counter() - mid
+
+def push_pop_many(cls, items, batch):
+    s = cls()
+    start = time.perf_counter()
+    for i in range(0, len(items), batch):
+        s.push_many(items[i:i + batch])
+    mid = time.perf_counter()
+    for i in range(0, len(items), batch):
+        s.pop_many(min(batch, len(s)))
+    return mid - start, time.perf_counter() - mid
+
+def bytes_per_item(cls, items):
+    tracemalloc.start()
+    s = cls()
+    for x in items:
+        s.push(x)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size / len(items)
+
+def calculate(cls, count):
+    # Sum of count products: x0*x0 + x1*x1 + ...
+    calc = stacks.Calculator(cls)
+    calc.push(0)
+    for x in range(count):
+        calc.push(x)
+        calc.push(x)
+        calc.mul()
+        calc.add()
+    return calc.pop()
+
+def main(count=1_000_000):
+    items = list(range(count))
+    print(f'{count} items, millions of items/s')
+    print(f'{"stack":<28} {"push":>8} {"pop":>8} {"bytes/item":>12} {"calculator":>12}')
+    for cls in STACKS:
+        push, pop = push_pop(cls, items)
+        memory = bytes_per_item(cls, range(1_000_000, 1_000_000 + count // 10))
+        total, calc = timed(calculate, cls, count // 10)
+        assert total == sum(x * x for x in range(count // 10))
+        print(f'{cls.__name__:<28} {count / push / 1e6:>8.2f} {count / pop / 1e6:>8.2f} '
+              f'{memory:>12.1f} {count / 10 / calc / 1e6:>12.2f}')
+    for batch in (64, 4096):
+        push, pop = push_pop_many(stacks.ArrayStack, items, batch)
+        label = f'ArrayStack (batch={batch})'
+        print(f'{label:<28} {count / push / 1e6:>8.2f} {count / pop / 1e6:>8.2f}')
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
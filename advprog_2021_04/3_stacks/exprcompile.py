@@ -0,0 +1,268 @@
+# exprcompile.py
+#
+# Compile math expressions into StackMachine instructions.
+#
+# The straightforward translation (Exercise 7 in stacks.py) walks the
+# tree from ast.parse() and emits "push left, push right, op" for every
+# binary operator.  compile_expression() does that and then tries to
+# make the program shorter:
+#
+#   - Constant folding.  Operators whose operands are both constants
+#     are worked out by the compiler.  Division by zero is left alone
+#     so that it still fails when the program runs.
+#
+#   - Common subexpressions.  If an operator has the same operand
+#     twice, as in (a + b) * (a + b), the operand is computed once and
+#     copied with 'dup'.  The same applies when one operand also appears
+#     directly inside the other, as in (a + b) - ((a + b) / c).  In that
+#     case 'dup' and 'swap' put the copy where it's needed.  A stack
+#     machine can only get at the top of the stack, so repeats that are
+#     further apart are not shared.
+#
+#   - Peephole optimization of the instruction list.  It removes
+#     multiplying by 1 and subtracting 0, a 'swap' right before an add
+#     or mul (those don't care about order), and swaps that undo each
+#     other.
+#
+# Each optimization can be turned off.  Compiled programs are cached,
+# keyed by the expression string (and the options):
+#
+#    >>> compile_expression('2 * (3 + 4)')
+#    (('push', 14),)
+#    >>> compile_expression('2 * (3 + 4)', fold=False)
+#    (('push', 2), ('push', 3), ('push', 4), ('add',), ('mul',))
+#    >>> compile_expression('(1.5 / 0 + 2) * (1.5 / 0 + 2)')
+#    (('push', 1.5), ('push', 0), ('div',), ('push', 2), ('add',), ('dup',), ('mul',))
+#    >>>
+#
+# Names in the expression become ('load', name) instructions, so the
+# program can be run on different values with StackMachine.run(program,
+# variables).
+
+import ast
+import functools
+import operator
+
+from stackcompile import constant_key
+
+BINOPS = {
+    ast.Add: 'add',
+    ast.Sub: 'sub',
+    ast.Mult: 'mul',
+    ast.Div: 'div',
+}
+
+FUNCTIONS = {
+    'add': operator.add,
+    'sub': operator.sub,
+    'mul': operator.mul,
+    'div': operator.truediv,
+}
+
+COMMUTATIVE = {'add', 'mul'}
+
+# The expression tree is made of tuples: ('const', value, key) for a
+# number, ('var', name) for a variable and (op, left, right) for an
+# operator.  The key is stackcompile.constant_key(value), so that 1, 1.0
+# and True, or 0.0 and -0.0, don't compare equal when looking for common
+# subexpressions.
+
+def _const(value):
+    return ('const', value, constant_key(value))
+
+def _tree(node):
+    if isinstance(node, ast.Expression):
+        return _tree(node.body)
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        return _const(node.value)
+    if isinstance(node, ast.Name):
+        return ('var', node.id)
+    if isinstance(node, ast.BinOp) and type(node.op) in BINOPS:
+        return (BINOPS[type(node.op)], _tree(node.left), _tree(node.right))
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.UAdd, ast.USub)):
+        operand = _tree(node.operand)
+        if isinstance(node.op, ast.UAdd):
+            return operand
+        if operand[0] == 'const':
+            return _const(-operand[1])
+        return ('mul', _const(-1), operand)
+    raise SyntaxError(f'Unsupported expression: {ast.unparse(node)}')
+
+def _leaf(tree):
+    return tree[0] in ('const', 'var')
+
+def _fold(tree):
+    if _leaf(tree):
+        return tree
+    op, left, right = tree[0], _fold(tree[1]), _fold(tree[2])
+    if left[0] == 'const' and right[0] == 'const':
+        try:
+            return _const(FUNCTIONS[op](left[1], right[1]))
+        except ArithmeticError:
+            pass                # Leave the error for run time
+    return (op, left, right)
+
+def _emit(tree, out, cse):
+    if tree[0] == 'const':
+        out.append(('push', tree[1]))
+        return
+    if tree[0] == 'var':
+        out.append(('load', tree[1]))
+        return
+    op, left, right = tree
+    if cse:
+        # Only worth it for operands that take more than one instruction
+        left_shared = not _leaf(left)
+        right_shared = not _leaf(right)
+        if left_shared and right == left:
+            # E op E
+            _emit(left, out, cse)
+            out.append(('dup',))
+            out.append((op,))
+            return
+        if left_shared and right_shared and right[1] == left:
+            # E op (E o F)
+            _emit(left, out, cse)
+            out.append(('dup',))
+            _emit(right[2], out, cse)
+            out.append((right[0],))
+            out.append((op,))
+            return
+        if left_shared and right_shared and right[2] == left:
+            # E op (F o E)
+            _emit(left, out, cse)
+            out.append(('dup',))
+            _emit(right[1], out, cse)
+            out.append(('swap',))
+            out.append((right[0],))
+            out.append((op,))
+            return
+        if right_shared and left_shared and left[1] == right:
+            # (E o F) op E
+            _emit(right, out, cse)
+            out.append(('dup',))
+            _emit(left[2], out, cse)
+            out.append((left[0],))
+            out.append(('swap',))
+            out.append((op,))
+            return
+        if right_shared and left_shared and left[2] == right:
+            # (F o E) op E
+            _emit(right, out, cse)
+            out.append(('dup',))
+            _emit(left[1], out, cse)
+            out.append(('swap',))
+            out.append((left[0],))
+            out.append(('swap',))
+            out.append((op,))
+            return
+    _emit(left, out, cse)
+    _emit(right, out, cse)
+    out.append((op,))
+
+def _is_int(op, value):
+    return len(op) == 2 and op[0] == 'push' and type(op[1]) is int and op[1] == value
+
+def optimize(instructions):
+    # Peephole optimization.  Works on any instruction list, and repeats
+    # until nothing changes.  For int and float operands, every rewrite
+    # gives exactly the same results (including the types), so x + 0 is
+    # left alone: -0.0 + 0 is 0.0.  A bool operand is the exception.
+    # True * 1 is 1, but with the multiply removed the result stays True.
+    program = list(instructions)
+    changed = True
+    while changed:
+        changed = False
+        out = []
+        for op in program:
+            out.append(op)
+            while True:
+                if len(out) >= 2 and out[-1] == ('mul',) and _is_int(out[-2], 1):
+                    del out[-2:]                # x * 1
+                elif len(out) >= 2 and out[-1] == ('sub',) and _is_int(out[-2], 0):
+                    del out[-2:]                # x - 0
+                elif len(out) >= 2 and out[-1][0] in COMMUTATIVE and out[-2] == ('swap',):
+                    del out[-2]                 # swap; add -> add
+                elif len(out) >= 2 and out[-1] == ('swap',) and out[-2] in (('swap',), ('dup',)):
+                    del out[-1]                 # dup; swap -> dup
+                    if out[-1] == ('swap',):
+                        del out[-1]             # swap; swap -> nothing
+                else:
+                    break
+                changed = True
+        program = out
+    return program
+
+@functools.lru_cache(maxsize=1024)
+def compile_expression(source, fold=True, cse=True, peephole=True):
+    tree = _tree(ast.parse(source, mode='eval'))
+    if fold:
+        tree = _fold(tree)
+    out = []
+    _emit(tree, out, cse)
+    if peephole:
+        out = optimize(out)
+    return tuple(out)
+
+def test_expressions():
+    from stacks import StackMachine, VersionedStack
+    from stackcompile import compile_program
+
+    assert compile_expression('2 * (3 + 4)') == (('push', 14),)
+    assert compile_expression('2 * (3 + 4)', fold=False) == (
+        ('push', 2), ('push', 3), ('push', 4), ('add',), ('mul',))
+    assert compile_expression('2 * (3 + 4)') is compile_expression('2 * (3 + 4)')
+
+    # Common subexpressions
+    assert compile_expression('(2 + 3) * (2 + 3)', fold=False) == (
+        ('push', 2), ('push', 3), ('add',), ('dup',), ('mul',))
+    assert compile_expression('(2 + 3) - (7 / (2 + 3))', fold=False) == (
+        ('push', 2), ('push', 3), ('add',), ('dup',), ('push', 7), ('swap',), ('div',), ('sub',))
+    assert compile_expression('(2 * 3 + 4) * (2 * 3)', fold=False) == (
+        ('push', 2), ('push', 3), ('mul',), ('dup',), ('push', 4), ('add',), ('mul',))
+    assert len(compile_expression('(2 + 3) * (2 + 3)', fold=False, cse=False)) == 7
+
+    # Peephole
+    assert optimize([('push', 5), ('push', 1), ('mul',), ('push', 0), ('sub',)]) == [('push', 5)]
+    assert optimize([('push', 5), ('push', 0), ('add',)]) == [('push', 5), ('push', 0), ('add',)]
+    assert optimize([('push', 5), ('push', 1.0), ('mul',)]) == [('push', 5), ('push', 1.0), ('mul',)]
+    assert optimize([('push', 1), ('push', 2), ('swap',), ('swap',), ('sub',)]) == [
+        ('push', 1), ('push', 2), ('sub',)]
+    assert optimize([('push', 1), ('dup',), ('swap',), ('add',)]) == [('push', 1), ('dup',), ('add',)]
+
+    # Every combination of options gives the same answer as Python
+    sources = [
+        "1.0 + (2 * (3 - (4 / (5 + (6 * (7 - (8 / 9)))))))",
+        "(1 + 2) * (1 + 2) - (1 + 2) / ((1 + 2) * 4)",
+        "-(2 - 7) * +3 - -4 * (2 - 7)",
+        "(2 ** 0 + 1) if 0 else 1",
+    ]
+    for source in sources[:3]:
+        expected = eval(source)
+        for options in range(8):
+            program = compile_expression(source, *[bool(options & bit) for bit in (1, 2, 4)])
+            assert StackMachine().run(program) == expected
+            assert compile_program(program)() == expected
+    # 0.0 and -0.0 are different subexpressions
+    program = compile_expression('(x + 0.0) * (x + -0.0)')
+    assert ('dup',) not in program
+    assert str(StackMachine().run(program, {'x': -0.0})) == str((-0.0 + 0.0) * (-0.0 + -0.0))
+
+    program = compile_expression('(x * y + 2 * 3) * (x * y + 2 * 3) - x')
+    assert program == (('load', 'x'), ('load', 'y'), ('mul',), ('push', 6), ('add',), ('dup',),
+                       ('mul',), ('load', 'x'), ('sub',))
+    assert StackMachine().run(program, {'x': 2, 'y': 0.5}) == 47
+    try:
+        compile_expression(sources[3])
+        assert False, "Expected SyntaxError"
+    except SyntaxError:
+        pass
+    try:
+        StackMachine(VersionedStack).run(compile_expression('(1 / 0) * 2'))
+        assert False, "Expected ZeroDivisionError"
+    except ZeroDivisionError:
+        pass
+    print('Good expressions')
+
+if __name__ == '__main__':
+    test_expressions()
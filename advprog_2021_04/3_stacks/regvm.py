@@ -0,0 +1,222 @@
+# regvm.py
+#
+# A register machine backend for StackMachine programs.
+#
+# On StackMachine, every operand goes through the stack.  An add is a
+# dispatch, then a Calculator method call, then two pop() calls and a
+# push() on the stack object.  Even the constants are pushed one at a
+# time.
+#
+# translate() turns the same instruction list into three-address code
+# for a machine with numbered registers:
+#
+#    >>> translate([('push', 2), ('push', 3), ('push', 4), ('mul',), ('add',)]).code
+#    [(<built-in function mul>, 3, 1, 2), (<built-in function add>, 3, 0, 3)]
+#    >>>
+#
+# Each instruction is (function, dest, src1, src2) and does
+#
+#    regs[dest] = function(regs[src1], regs[src2])
+#
+# Only arithmetic produces any code.  Constants and variables get
+# registers of their own, filled in once before the code runs, and
+# 'push' and 'load' just note which register holds the value.  'dup',
+# 'swap', 'checkpoint' and 'backtrack' only rearrange the notes.  The
+# registers for intermediate results are reused as soon as the value
+# in them has been consumed, so a long program needs only a few.
+#
+# RegisterMachine.run() takes the same instructions and variables as
+# StackMachine.run() and gives the same results.  Translated programs
+# are cached.
+
+import functools
+import heapq
+import operator
+
+from stackcompile import constant_key, program_key
+
+FUNCTIONS = {
+    'add': operator.add,
+    'sub': operator.sub,
+    'mul': operator.mul,
+    'div': operator.truediv,
+}
+
+def _underflow(x, y):
+    raise IndexError('pop from empty list')
+
+class RegisterProgram:
+    def __init__(self, code, consts, variables, nregs, result):
+        self.code = code                # [(function, dest, src1, src2)]
+        self.consts = consts            # Values of registers 0 .. len(consts)-1
+        self.variables = variables      # [(register, name)]
+        self.nregs = nregs
+        self.result = result            # Register holding the result
+
+    def __len__(self):
+        return len(self.code)
+
+    def run(self, variables=None):
+        if variables is None:
+            variables = {}
+        regs = self.consts + [None] * (self.nregs - len(self.consts))
+        for reg, name in self.variables:
+            regs[reg] = variables[name]
+        for func, dest, src1, src2 in self.code:
+            regs[dest] = func(regs[src1], regs[src2])
+        return regs[self.result]
+
+class _Allocator:
+    # Hands out temporary registers, lowest number first, and takes them
+    # back when nothing refers to them any more.
+    def __init__(self, first):
+        self.next = first
+        self.free = []
+        self.refs = {}
+
+    def allocate(self):
+        reg = heapq.heappop(self.free) if self.free else self._new()
+        self.refs[reg] = 1
+        return reg
+
+    def _new(self):
+        self.next += 1
+        return self.next - 1
+
+    def hold(self, reg):
+        if reg in self.refs:
+            self.refs[reg] += 1
+
+    def release(self, reg):
+        if reg in self.refs:
+            self.refs[reg] -= 1
+            if not self.refs[reg]:
+                del self.refs[reg]
+                heapq.heappush(self.free, reg)
+
+def translate(instructions):
+    program = list(instructions)
+
+    # First pass: a register for every distinct constant and variable
+    consts = []
+    const_regs = {}
+    variables = []
+    var_regs = {}
+    for op in program:
+        if op[0] == 'push':
+            key = constant_key(op[1])
+            if key not in const_regs:
+                const_regs[key] = len(consts)
+                consts.append(op[1])
+    for op in program:
+        if op[0] == 'load' and op[1] not in var_regs:
+            var_regs[op[1]] = len(consts) + len(variables)
+            variables.append((var_regs[op[1]], op[1]))
+
+    # Second pass: run the program on a stack of register numbers
+    temps = _Allocator(len(consts) + len(variables))
+    code = []
+    stack = []
+    checkpoints = []
+    for op in program:
+        name = op[0]
+        if name == 'push':
+            stack.append(const_regs[constant_key(op[1])])
+        elif name == 'load':
+            stack.append(var_regs[op[1]])
+        elif name in FUNCTIONS:
+            if len(stack) < 2:
+                break
+            x = stack.pop()
+            y = stack.pop()
+            temps.release(x)
+            temps.release(y)
+            dest = temps.allocate()
+            code.append((FUNCTIONS[name], dest, y, x))
+            stack.append(dest)
+        elif name == 'dup':
+            if not stack:
+                break
+            temps.hold(stack[-1])
+            stack.append(stack[-1])
+        elif name == 'swap':
+            if len(stack) < 2:
+                break
+            stack[-1], stack[-2] = stack[-2], stack[-1]
+        elif name == 'checkpoint':
+            for reg in stack:
+                temps.hold(reg)
+            checkpoints.append(list(stack))
+        elif name == 'backtrack':
+            if not checkpoints:
+                break
+            for reg in stack:
+                temps.release(reg)
+            stack = checkpoints.pop()
+        else:
+            raise ValueError(f'Unknown instruction {op!r}')
+    else:
+        if stack:
+            return RegisterProgram(code, consts, variables, temps.next, stack[-1])
+    # Ran out of stack.  Raise the error after running the code before it.
+    code.append((_underflow, 0, 0, 0))
+    return RegisterProgram(code, consts, variables, max(temps.next, 1), 0)
+
+@functools.lru_cache(maxsize=256)
+def _translate(key):
+    program = key[0]
+    return translate(program)
+
+class RegisterMachine:
+    # Drop-in replacement for StackMachine
+    def run(self, instructions, variables=None):
+        return _translate(program_key(instructions)).run(variables)
+
+def test_register_machine():
+    from exprcompile import compile_expression
+    from stacks import StackMachine, VersionedStack, instructions
+
+    assert RegisterMachine().run(instructions) == 14
+    program = translate(instructions)
+    assert [(f.__name__, d, a, b) for f, d, a, b in program.code] == [('mul', 3, 1, 2), ('add', 3, 0, 3)]
+
+    programs = [
+        instructions + [('push', 7), ('div',)],
+        [('push', 2), ('checkpoint',), ('push', 3), ('mul',), ('backtrack',), ('push', 5), ('add',)],
+        [('push', 2), ('push', 3), ('add',), ('checkpoint',), ('dup',), ('mul',), ('backtrack',),
+         ('push', 1), ('sub',)],
+        [('push', 1), ('push', 1.0), ('div',), ('push', True), ('add',)],
+        list(compile_expression('(x + y) * (x + y) - (x * 2 - y) / ((x * 2 - y) + 1)')),
+        list(compile_expression('(x + 1) - ((x + 1) / y)', fold=False)),
+    ]
+    variables = {'x': 3, 'y': 2.5}
+    for prog in programs:
+        expected = StackMachine(VersionedStack).run(prog, variables)
+        result = RegisterMachine().run(prog, variables)
+        assert result == expected and type(result) is type(expected)
+
+    # 0.0 and -0.0 get registers of their own
+    result = RegisterMachine().run([('push', 0.0), ('push', -0.0), ('mul',)])
+    assert str(result) == str(StackMachine().run([('push', 0.0), ('push', -0.0), ('mul',)])) == '-0.0'
+
+    # Temporaries are reused: a long chain needs only one
+    chain = [('push', 1)] + [('push', 2), ('add',)] * 1000
+    program = translate(chain)
+    assert len(program) == 1000 and program.nregs == 3
+    assert program.run() == 2001
+
+    for prog in ([('push', 1), ('add',)], [('push', 1), ('backtrack',)], [], [('dup',)]):
+        try:
+            RegisterMachine().run(prog)
+            assert False, "Expected IndexError"
+        except IndexError:
+            pass
+    try:
+        RegisterMachine().run([('push', 1), ('push', 0), ('div',), ('add',)])
+        assert False, "Expected ZeroDivisionError"
+    except ZeroDivisionError:
+        pass
+    print('Good register machine')
+
+if __name__ == '__main__':
+    test_register_machine()
@@ -0,0 +1,205 @@
+# stackcompile.py
+#
+# A compiler for StackMachine programs.
+#
+# StackMachine.run() interprets the instructions.  For every instruction
+# it goes through a chain of string comparisons, then a Calculator
+# method, then push()/pop() calls on the stack object.  None of that
+# depends on the data, and it's repeated every time the program runs.
+#
+# compile_program() does that work once.  It runs the program with a
+# "symbolic" stack holding variable names instead of values, and emits
+# one line of straight-line Python for each arithmetic instruction
+# (c holds any constants that can't be written as literals, and v the
+# variables for 'load'):
+#
+#    >>> print(program_source([('push', 2), ('push', 3), ('push', 4), ('mul',), ('add',)]))
+#    def program(c, v=None):
+#        t0 = 3 * 4
+#        t1 = 2 + t0
+#        return t1
+#    >>>
+#
+# The source is passed to compile() and the resulting function is
+# cached, keyed by the instruction tuple.  Running a compiled program
+# is a single function call:
+#
+#    >>> program = compile_program(instructions)
+#    >>> program()
+#    14
+#
+# The results are the same as StackMachine (with a plain Stack).  The
+# same Python operators run in the same order, and a program that
+# runs out of stack raises IndexError at the point where it does so.
+# Because the stack only exists while compiling, 'dup', 'swap',
+# 'checkpoint' and 'backtrack' are free.  They only rearrange (or save
+# and restore) the symbolic stack and produce no code at all.
+
+import functools
+import operator
+
+OPERATORS = {
+    'add': '+',
+    'sub': '-',
+    'mul': '*',
+    'div': '/',
+}
+
+def _literal(value, consts):
+    # Ints and finite floats can be written into the source.  Anything
+    # else is passed in through the constants tuple.
+    if type(value) is int or (type(value) is float and value - value == 0):
+        return repr(value)
+    consts.append(value)
+    return f'c[{len(consts) - 1}]'
+
+def _generate(program):
+    consts = []
+    lines = []
+    stack = []              # Symbolic stack: source text of each value
+    checkpoints = []
+    temps = 0
+    loads = False
+
+    def underflow(message):
+        lines.append(f'raise IndexError({message!r})')
+
+    for op in program:
+        name = op[0]
+        if name == 'push':
+            stack.append(_literal(op[1], consts))
+        elif name == 'load':
+            if not loads:
+                # Like StackMachine.run(), no variables means an empty
+                # mapping, so a missing name is a KeyError
+                lines.append('v = {} if v is None else v')
+            loads = True
+            lines.append(f't{temps} = v[{op[1]!r}]')
+            stack.append(f't{temps}')
+            temps += 1
+        elif name in OPERATORS:
+            if len(stack) < 2:
+                underflow('pop from empty list')
+                break
+            x = stack.pop()
+            y = stack.pop()
+            lines.append(f't{temps} = {y} {OPERATORS[name]} {x}')
+            stack.append(f't{temps}')
+            temps += 1
+        elif name == 'dup':
+            if not stack:
+                underflow('pop from empty list')
+                break
+            stack.append(stack[-1])
+        elif name == 'swap':
+            if len(stack) < 2:
+                underflow('pop from empty list')
+                break
+            stack[-1], stack[-2] = stack[-2], stack[-1]
+        elif name == 'checkpoint':
+            checkpoints.append(list(stack))
+        elif name == 'backtrack':
+            if not checkpoints:
+                underflow('pop from empty list')
+                break
+            stack = checkpoints.pop()
+        else:
+            raise ValueError(f'Unknown instruction {op!r}')
+    else:
+        if stack:
+            lines.append(f'return {stack[-1]}')
+        else:
+            underflow('pop from empty list')
+    return lines, tuple(consts)
+
+def _source(lines):
+    return 'def program(c, v=None):\n' + ''.join(f'    {line}\n' for line in lines)
+
+def program_source(instructions):
+    lines, _ = _generate(instructions)
+    return _source(lines)
+
+def program_key(instructions):
+    # 1, 1.0 and True are equal (and hash the same), but they don't give
+    # the same results, so the type of each push value is part of the
+    # key.  Instructions have at most one argument, so it's the last
+    # item.  Everything here runs in C, so a cache hit is cheap even for
+    # a long program.  0.0 and -0.0 are equal as well.  Programs that
+    # contain a zero also get the repr() of every value in the key.
+    program = tuple(instructions)
+    values = tuple(map(operator.itemgetter(-1), program))
+    key = (program, tuple(map(type, values)))
+    if 0.0 in values:
+        key += (tuple(map(repr, values)),)
+    return key
+
+def constant_key(value):
+    # The same distinction for a single constant
+    if type(value) is float and value == 0:
+        return (float, repr(value))
+    return (type(value), value)
+
+@functools.lru_cache(maxsize=256)
+def _compile(key):
+    program = key[0]
+    lines, consts = _generate(program)
+    namespace = { }
+    exec(compile(_source(lines), '<stackcompile>', 'exec'), namespace)
+    return functools.partial(namespace['program'], consts)
+
+def compile_program(instructions):
+    return _compile(program_key(instructions))
+
+class CompiledStackMachine:
+    # Drop-in replacement for StackMachine.run()
+    def run(self, instructions, variables=None):
+        return compile_program(instructions)(variables)
+
+def test_compile():
+    import math
+    from stacks import StackMachine, VersionedStack, instructions
+
+    program = compile_program(instructions)
+    assert program() == 14
+    assert compile_program(list(instructions)) is program
+    assert compile_program([('push', 2.0)] + instructions[1:]) is not program
+    assert math.copysign(1, compile_program([('push', 0.0)])()) == 1
+    assert math.copysign(1, compile_program([('push', -0.0)])()) == -1
+
+    programs = [
+        instructions + [('push', 7), ('div',)],
+        [('push', 1.5), ('push', 2), ('sub',), ('push', 3), ('mul',)],
+        [('push', 10**30), ('push', 3), ('div',)],
+        [('push', math.inf), ('push', 1), ('add',)],
+        [('push', 2), ('checkpoint',), ('push', 3), ('mul',), ('backtrack',), ('push', 5), ('add',)],
+        [('push', 1), ('push', 2), ('push', 3), ('add',)],
+        [('push', 2), ('push', 3), ('add',), ('dup',), ('mul',), ('push', 10), ('swap',), ('sub',)],
+        [('load', 'x'), ('load', 'y'), ('load', 'x'), ('mul',), ('sub',)],
+    ]
+    variables = {'x': 3, 'y': 2.5}
+    for prog in programs:
+        assert (CompiledStackMachine().run(prog, variables) ==
+                StackMachine(VersionedStack).run(prog, variables))
+
+    for prog in ([('push', 1), ('add',)], [('push', 1), ('backtrack',)], [], [('dup',)],
+                 [('push', 1), ('swap',)]):
+        try:
+            compile_program(prog)()
+            assert False, "Expected IndexError"
+        except IndexError:
+            pass
+    try:
+        compile_program([('push', 1), ('push', 0), ('div',)])()
+        assert False, "Expected ZeroDivisionError"
+    except ZeroDivisionError:
+        pass
+    for prog in ([('load', 'x')], [('push', 1), ('load', 'y'), ('add',)]):
+        try:
+            compile_program(prog)()
+            assert False, "Expected KeyError"
+        except KeyError:
+            pass
+    print('Good compiler')
+
+if __name__ == '__main__':
+    test_compile()
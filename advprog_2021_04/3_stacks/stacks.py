@@ -58,7 +58,8 @@ def test_stack():
     assert len(s) == 0
     print("Good stack!")
 
-test_stack()
+if __name__ == '__main__':
+    test_stack()
 
 # -----------------------------------------------------------------------------
 # Exercise 2 - A Calculator
@@ -90,39 +91,63 @@ test_stack()
 # -----------------------------------------------------------------------------
 
 
+import operator
+
 class Calculator:
     def __init__(self, stack):
         self._stack = stack()
 
+    def _binop(self, func):
+        x = self._stack.pop()
+        try:
+            y = self._stack.pop()
+        except BaseException:
+            self._stack.push(x)         # Only one item.  Put it back.
+            raise
+        try:
+            self._stack.push(func(y, x))
+        except BaseException:
+            # Leave the stack as it was, e.g. when an IntArrayStack is
+            # given the float result of a division
+            self._stack.push(y)
+            self._stack.push(x)
+            raise
+
     def add(self):
-        x = len(self._stack) - 1
-        y = len(self._stack) - 2
-        result = y + x
-        self._stack.push(result)
-    
+        self._binop(operator.add)
+
     def sub(self):
-        x = len(self._stack) - 1
-        y = len(self._stack) - 2
-        result =  y - x
-        self._stack.push(result)
+        self._binop(operator.sub)
 
-    def mul(self ):
-        x = len(self._stack) - 1
-        y = len(self._stack) - 2
-        result = y * x
-        self._stack.push(result)
+    def mul(self):
+        self._binop(operator.mul)
 
     def div(self):
-        x = len(self._stack) - 1
-        y = len(self._stack) - 2
-        result =  y // x
-        self._stack.push(result)
+        self._binop(operator.truediv)
 
     def push(self, x):
         self._stack.push(x)
-    
+
     def pop(self):
-        self._stack.pop()
+        return self._stack.pop()
+
+    def dup(self):
+        x = self._stack.pop()
+        self._stack.push(x)
+        self._stack.push(x)
+
+    def swap(self):
+        x = self._stack.pop()
+        y = self._stack.pop()
+        self._stack.push(x)
+        self._stack.push(y)
+
+    # Only for stacks that can take snapshots (see VersionedStack below)
+    def snapshot(self):
+        return self._stack.snapshot()
+
+    def restore(self, snapshot):
+        self._stack.restore(snapshot)
 
 def test_calculator(calc):
     calc.push(23)
@@ -223,14 +248,245 @@ class NumericStack:
     def __len__(self):
         return len(self._items)
 
+# An implementation of a numeric stack backed by an array instead of a
+# list.  Numbers are stored unboxed (8 bytes each), and the type check
+# is done by the array itself, in C, instead of with an isinstance()
+# call on every push.  The array over-allocates as it grows, so pushes
+# take amortized constant time.
+#
+# push_many() and pop_many() move a whole batch of numbers at once.  A
+# batch is converted to an array before it is added, so it is
+# validated in one go, and a bad value leaves the stack unchanged:
+#
+#      >>> s = ArrayStack()
+#      >>> s.push_many([1, 2, 3, 4])
+#      >>> s.pop_many(2)
+#      [3.0, 4.0]
+#      >>> s.push_many([5, 'six'])
+#      Traceback (most recent call last):
+#      ...
+#      TypeError: must be real number, not str
+#      >>> len(s)
+#      2
+#
+# ArrayStack holds floats.  IntArrayStack holds 64-bit integers.  An
+# int pushed onto an ArrayStack becomes a float, so integers above 2**53
+# don't come back exactly.  Use IntArrayStack for those.  Division
+# gives a float, which an IntArrayStack won't take, so Calculator.div()
+# on an IntArrayStack raises TypeError and leaves the stack unchanged.
+
+from array import array
+
+class ArrayStack:
+    typecode = 'd'
+
+    def __init__(self):
+        self._items = array(self.typecode)
+
+    def push(self, item):
+        self._items.append(item)
+
+    def pop(self):
+        return self._items.pop()
+
+    def push_many(self, items):
+        if not isinstance(items, array) or items.typecode != self.typecode:
+            items = array(self.typecode, items)
+        self._items.extend(items)
+
+    def pop_many(self, count):
+        # Remove the top count items.  They are returned in the order
+        # they were pushed, so push_many(pop_many(n)) changes nothing.
+        if not 0 <= count <= len(self._items):
+            raise IndexError(f'cannot pop {count} items from a stack of {len(self._items)}')
+        if count == 0:
+            return []
+        items = self._items[-count:].tolist()
+        del self._items[-count:]
+        return items
+
+    def __len__(self):
+        return len(self._items)
+
+class IntArrayStack(ArrayStack):
+    typecode = 'q'
+
+def test_array_stack():
+    for cls in (ArrayStack, IntArrayStack):
+        s = cls()
+        s.push(23)
+        s.push_many(range(5))
+        assert len(s) == 6
+        assert s.pop_many(2) == [3, 4]
+        assert s.pop() == 2
+        try:
+            s.push_many([5, 'six'])
+            assert False, "Expected TypeError"
+        except TypeError:
+            pass
+        assert len(s) == 3
+        assert s.pop_many(3) == [23, 0, 1]
+        try:
+            s.pop_many(1)
+            assert False, "Expected IndexError"
+        except IndexError:
+            pass
+    s = IntArrayStack()
+    try:
+        s.push(2.5)
+        assert False, "Expected TypeError"
+    except TypeError:
+        pass
+    test_calculator(Calculator(ArrayStack))
+
+    calc = Calculator(IntArrayStack)
+    calc.push(10)
+    calc.push(4)
+    try:
+        calc.div()
+        assert False, "Expected TypeError"
+    except TypeError:
+        pass
+    assert calc.pop() == 4 and calc.pop() == 10
+
+    for stack in (Stack, ArrayStack, IntArrayStack):
+        calc = Calculator(stack)
+        calc.push(7)
+        try:
+            calc.add()
+            assert False, "Expected IndexError"
+        except IndexError:
+            pass
+        assert calc.pop() == 7
+    print("Good array stack!")
+
+if __name__ == '__main__':
+    test_array_stack()
+
+# ImmutableStack is made of immutable tuples, but the stack itself is
+# still changed in place by push() and pop(), so old versions are lost.
+# PersistentStack is immutable all the way through.  push() and pop()
+# return a new stack and leave the original alone.  Each stack is a
+# single cell holding the top item and a reference to the rest, so a
+# new version shares everything below its top with the old one:
+#
+#      >>> s1 = PersistentStack().push(1).push(2)
+#      >>> s2 = s1.push(3)
+#      >>> list(s1), list(s2)
+#      ([2, 1], [3, 2, 1])
+#      >>> item, s3 = s2.pop()
+#      >>> item, s3 is s1
+#      (3, True)
+#
+# VersionedStack puts the usual mutable push()/pop() interface on top
+# of a PersistentStack, so it works with Calculator.  Its snapshot()
+# just hands out the current PersistentStack and restore() puts one
+# back, so both are O(1) and never copy anything.
+
+class PersistentStack:
+    __slots__ = ('_top', '_rest', '_size')
+
+    def __init__(self, items=()):
+        self._top = None
+        self._rest = None
+        self._size = 0
+        if items:
+            stack = PersistentStack()
+            for item in items:
+                stack = stack.push(item)
+            # Take over the top cell so that self is the new stack
+            self._top, self._rest, self._size = stack._top, stack._rest, stack._size
+
+    def push(self, item):
+        stack = PersistentStack.__new__(PersistentStack)
+        stack._top = item
+        stack._rest = self
+        stack._size = self._size + 1
+        return stack
+
+    def pop(self):
+        if not self._size:
+            raise IndexError('pop from empty stack')
+        return self._top, self._rest
+
+    def peek(self):
+        if not self._size:
+            raise IndexError('peek at empty stack')
+        return self._top
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        # Items from the top of the stack down
+        stack = self
+        while stack._size:
+            yield stack._top
+            stack = stack._rest
+
+    def __repr__(self):
+        return f'PersistentStack({list(reversed(list(self)))!r})'
+
+class VersionedStack:
+    def __init__(self):
+        self._stack = PersistentStack()
+
+    def push(self, item):
+        self._stack = self._stack.push(item)
+
+    def pop(self):
+        item, self._stack = self._stack.pop()
+        return item
+
+    def __len__(self):
+        return len(self._stack)
+
+    def snapshot(self):
+        return self._stack
+
+    def restore(self, snapshot):
+        self._stack = snapshot
+
+def test_persistent_stack():
+    empty = PersistentStack()
+    s1 = empty.push(1).push(2)
+    s2 = s1.push(3)
+    assert (len(empty), len(s1), len(s2)) == (0, 2, 3)
+    assert list(s1) == [2, 1] and list(s2) == [3, 2, 1]
+    item, s3 = s2.pop()
+    assert item == 3 and s3 is s1
+    assert PersistentStack([1, 2, 3]).peek() == 3
+    assert list(PersistentStack([1, 2, 3])) == [3, 2, 1]
+    try:
+        empty.pop()
+        assert False, "Expected IndexError"
+    except IndexError:
+        pass
+
+    s = VersionedStack()
+    s.push(1)
+    s.push(2)
+    saved = s.snapshot()
+    s.pop()
+    s.push(10)
+    s.push(20)
+    assert list(s.snapshot()) == [20, 10, 1]
+    s.restore(saved)
+    assert len(s) == 2 and s.pop() == 2
+    test_calculator(Calculator(VersionedStack))
+    print("Good persistent stack!")
+
+if __name__ == '__main__':
+    test_persistent_stack()
+
 # Figure out some way to use either one of these stacks with your 
 # calculator.  Make sure you can run the test_calculator() test and
 # that it works without modification.
 
-calc = Calculator(ImmutableStack)
-
-test_calculator(calc)
-#test_calculator(... use NumericStack ...)
+if __name__ == '__main__':
+    test_calculator(Calculator(Stack))
+    test_calculator(Calculator(ImmutableStack))
+    test_calculator(Calculator(NumericStack))
 
 # -----------------------------------------------------------------------------
 # Exercise 4 - Interfaces
@@ -283,36 +539,84 @@ instructions = [
     ('add',),
 ]
 
-class StackMachine:
-
-    def __init__(self):
-        self.calculator = Calculator()
+# Besides the arithmetic, ('dup',) pushes another copy of the top item
+# and ('swap',) exchanges the top two items.  ('load', name) pushes the
+# value of a variable, taken from the dict passed to run().
+#
+# The machine can also save the state of its stack with a ('checkpoint',)
+# instruction and go back to the most recent checkpoint with
+# ('backtrack',).  That needs a stack that supports snapshots, such as
+# VersionedStack, which makes both instructions O(1).
 
-    ... # you define
-    def run(self, instructions):
+class StackMachine:
+    def __init__(self, stack=Stack):
+        self.calculator = Calculator(stack)
+        self.checkpoints = []
+
+    def checkpoint(self):
+        try:
+            self.checkpoints.append(self.calculator.snapshot())
+        except AttributeError:
+            raise TypeError('checkpoints need a stack with snapshot() and restore()') from None
+
+    def backtrack(self):
+        self.calculator.restore(self.checkpoints.pop())
+
+    def run(self, instructions, variables=None):
+        if variables is None:
+            variables = {}
         for op in instructions:
             if op[0] == 'push':
                 self.calculator.push(op[1])
-            if op[0] == 'add':
+            elif op[0] == 'load':
+                self.calculator.push(variables[op[1]])
+            elif op[0] == 'add':
                 self.calculator.add()
-            if op[0] == 'mul':
+            elif op[0] == 'mul':
                 self.calculator.mul()
-            if op[0] == 'sub':
+            elif op[0] == 'sub':
                 self.calculator.sub()
+            elif op[0] == 'div':
+                self.calculator.div()
+            elif op[0] == 'dup':
+                self.calculator.dup()
+            elif op[0] == 'swap':
+                self.calculator.swap()
+            elif op[0] == 'checkpoint':
+                self.checkpoint()
+            elif op[0] == 'backtrack':
+                self.backtrack()
+            else:
+                raise ValueError(f'Unknown instruction {op!r}')
         return self.calculator.pop()
 
-        
-        
-        ... # you define
-
 def test_stack_machine():
-    mach = StackMachine()    # Might need additional args
+    mach = StackMachine()
     result = mach.run(instructions)
     assert result == 14
+
+    for stack in (ImmutableStack, NumericStack, ArrayStack, VersionedStack):
+        assert StackMachine(stack).run(instructions + [('push', 7), ('div',)]) == 2
+
+    # Try 2 * 3, throw it away, and add 5 instead
+    mach = StackMachine(VersionedStack)
+    result = mach.run([('push', 2), ('checkpoint',), ('push', 3), ('mul',),
+                       ('backtrack',), ('push', 5), ('add',)])
+    assert result == 7
+
+    # (2 + 3) * (2 + 3) and 10 - (2 + 3)
+    assert mach.run([('push', 2), ('push', 3), ('add',), ('dup',), ('mul',)]) == 25
+    assert mach.run([('push', 2), ('push', 3), ('add',), ('push', 10), ('swap',), ('sub',)]) == 5
+    assert mach.run([('load', 'x'), ('push', 1), ('add',)], {'x': 41}) == 42
+    try:
+        StackMachine(Stack).run([('push', 1), ('checkpoint',)])
+        assert False, "Expected TypeError"
+    except TypeError:
+        pass
     print("Good machine!")
 
-# Uncomment
-# test_stack_machine()
+if __name__ == '__main__':
+    test_stack_machine()
 
 # -----------------------------------------------------------------------------
 # Exercise 7 - The Parser (Challenge)
@@ -346,25 +650,28 @@ def test_stack_machine():
 
 def parse_challenge():
     import ast
-    tree = ast.parse("1.0 + (2 * (3 - (4 / (5 + (6 * (7 - (8 / 9)))))))", mode='eval')
+    from exprcompile import compile_expression
+    source = "1.0 + (2 * (3 - (4 / (5 + (6 * (7 - (8 / 9)))))))"
+    tree = ast.parse(source, mode='eval')
 
     # Study this output
     print(ast.dump(tree))
 
-    # Make instructions (somehow)
-    instructions = []
+    # Make instructions by walking the tree (see exprcompile.py).  With
+    # optimizations turned off, this is exactly the push/op sequence
+    # described above.
+    instructions = list(compile_expression(source, fold=False, cse=False, peephole=False))
+    print(instructions)
 
     # Run the instructions
     s = StackMachine()
     result = s.run(instructions)
     print(result)
+    assert result == eval(source)
 
-# Uncomment
-# parse_challenge()    
-
-
+    # With constant folding, the whole expression is worked out by the
+    # compiler and the program is a single push
+    print(compile_expression(source))
 
-
-        
-
-        
+if __name__ == '__main__':
+    parse_challenge()
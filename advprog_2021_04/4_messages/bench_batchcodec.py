@@ -0,0 +1,67 @@
+# bench_batchcodec.py
+#
+# Messages per second for message.encode/decode one at a time against
+# encode_many/decode_many, at batch sizes 1, 64 and 4096.  The same
+# mix of chat and update messages as bench_codec.py.  Message.__del__
+# prints go to /dev/null.
+#
+#     shell % python bench_batchcodec.py [count]
+
+import os
+import sys
+import time
+from contextlib import redirect_stdout
+
+import message
+from bench_codec import make_messages
+
+def timed(func, *args, repeat=5):
+    # Best of several runs
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        t = time.perf_counter() - start
+        best = t if best is None else min(best, t)
+    return best
+
+def single(batches):
+    encode = message.encode
+    decode = message.decode
+    for batch in batches:
+        for msg in [decode(raw) for raw in [encode(m) for m in batch]]:
+            pass
+
+def batched(batches):
+    encode_many = message.encode_many
+    decode_many = message.decode_many
+    for batch in batches:
+        for msg in decode_many(encode_many(batch)):
+            pass
+
+def encode_single(batches):
+    encode = message.encode
+    for batch in batches:
+        b''.join([encode(m) for m in batch])
+
+def encode_batched(batches):
+    encode_many = message.encode_many
+    for batch in batches:
+        encode_many(batch)
+
+def main(count=262_144):
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        messages = make_messages(count)
+        results = []
+        for size in (1, 64, 4096):
+            batches = [messages[n:n + size] for n in range(0, count, size)]
+            results.append((size, [count / timed(func, batches)
+                                   for func in (encode_single, encode_batched, single, batched)]))
+            del batches
+        del messages
+    print(f'{"batch":>6} {"encode/s":>12} {"encode_many/s":>14} {"round trip/s":>13} {"_many/s":>12}')
+    for size, rates in results:
+        print(f'{size:>6} {rates[0]:>12,.0f} {rates[1]:>14,.0f} {rates[2]:>13,.0f} {rates[3]:>12,.0f}')
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
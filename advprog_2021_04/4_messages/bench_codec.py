@@ -0,0 +1,64 @@
+# bench_codec.py
+#
+# Encode/decode throughput and encoded size for the game messages with
+# the struct-based codec (message.encode/decode), pickle and JSON.  The
+# JSON encoding is a list [type, source, dest, sequence, fields...],
+# which is about as compact as JSON gets.  Message.__del__ prints go to
+# /dev/null.
+#
+#     shell % python bench_codec.py [count]
+
+import json
+import os
+import pickle
+import sys
+import time
+from contextlib import redirect_stdout
+
+import message
+from message import ChatMessage, Message, PlayerUpdate
+
+TYPES = {cls.__name__: cls for cls in (ChatMessage, PlayerUpdate)}
+
+def json_encode(msg):
+    return json.dumps([type(msg.payload).__name__, msg.source, msg.dest, msg.sequence,
+                       *msg.payload]).encode('utf-8')
+
+def json_decode(raw):
+    name, source, dest, sequence, *fields = json.loads(raw)
+    return Message(source, dest, TYPES[name](*fields), sequence)
+
+CODECS = [
+    ('struct', message.encode, message.decode),
+    ('pickle', pickle.dumps, pickle.loads),
+    ('json', json_encode, json_decode),
+]
+
+def timed(func, items):
+    start = time.perf_counter()
+    for item in items:
+        func(item)
+    return time.perf_counter() - start
+
+def make_messages(count):
+    return [Message(i % 100, i % 7, ChatMessage(i, f'Player {i} says hello'))
+            if i % 2 else Message(i % 100, i % 7, PlayerUpdate(i, i * 0.5, -i / 3))
+            for i in range(count)]
+
+def main(count=200_000):
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        messages = make_messages(count)
+        results = []
+        for name, encode, decode in CODECS:
+            raws = [encode(m) for m in messages]
+            assert all(decode(raw) == m for raw, m in zip(raws[:1000], messages))
+            size = sum(map(len, raws)) / count
+            results.append((name, count / timed(encode, messages), count / timed(decode, raws), size))
+            del raws
+        del messages
+    print(f'{"":<8} {"encode/s":>12} {"decode/s":>12} {"bytes/message":>14}')
+    for name, encodes, decodes, size in results:
+        print(f'{name:<8} {encodes:>12,.0f} {decodes:>12,.0f} {size:>14.1f}')
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,71 @@
+# bench_dispatch.py
+#
+# send() latency for message.PubSubDispatcher, which keeps a tuple of
+# receive_message() methods per address, against the original version
+# that kept a defaultdict(set) of handlers.  Messages go to an address
+# with 1 or 1000 subscribers, and then to a million different
+# addresses that nobody subscribed to.  Handlers do nothing.
+#
+#     shell % python bench_dispatch.py [count]
+
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+
+from fastmsg import FastMessage
+from message import PubSubDispatcher
+
+class SetDispatcher:
+    # The original PubSubDispatcher
+    def __init__(self):
+        self.subscribers = defaultdict(set)
+
+    def subscribe(self, addr, handler):
+        self.subscribers[addr].add(handler)
+
+    def send(self, msg):
+        for handler in self.subscribers[msg.dest]:
+            handler.receive_message(msg)
+
+class NullHandler:
+    def receive_message(self, msg):
+        pass
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+def send_all(dispatcher, messages):
+    send = dispatcher.send
+    for msg in messages:
+        send(msg)
+
+def make_dispatcher(cls):
+    dispatcher = cls()
+    dispatcher.subscribe(1, NullHandler())
+    for _ in range(1000):
+        dispatcher.subscribe(2, NullHandler())
+    return dispatcher
+
+def main(count=100_000, addresses=1_000_000):
+    print(f'{"":<20} {"1 subscriber":>14} {"1000 subscribers":>17} {"1M addresses":>13} {"memory":>10}')
+    messages = [FastMessage(0, dest) for dest in range(10, 10 + addresses)]
+    for cls in (SetDispatcher, PubSubDispatcher):
+        dispatcher = make_dispatcher(cls)
+        one = timed(send_all, dispatcher, [FastMessage(0, 1)] * count) / count
+        many = timed(send_all, dispatcher, [FastMessage(0, 2)] * (count // 1000)) / (count // 1000)
+        spread = timed(send_all, dispatcher, messages) / addresses
+        # Memory left behind by sending to all of those addresses
+        dispatcher = make_dispatcher(cls)
+        tracemalloc.start()
+        send_all(dispatcher, messages)
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del dispatcher
+        print(f'{cls.__name__:<20} {one * 1e9:>11,.0f} ns {many * 1e6:>14,.1f} us '
+              f'{spread * 1e9:>10,.0f} ns {size / 2**20:>7,.1f} MB')
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
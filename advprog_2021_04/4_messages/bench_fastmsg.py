@@ -0,0 +1,69 @@
+# bench_fastmsg.py
+#
+# Allocation rate and memory per message for message.Message and
+# fastmsg.FastMessage, with and without a MessagePool.  Each message is
+# created and then dropped (or released), like a message that is
+# decoded, dispatched and forgotten.  The "printing" of Message.__del__
+# goes to /dev/null, but the call still happens.
+#
+#     shell % python bench_fastmsg.py [count]
+
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+
+import fastmsg
+import message
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+def churn_message(count):
+    Message = message.Message
+    for i in range(count):
+        m = Message(0, 1, i)
+        del m
+
+def churn_fast(count):
+    FastMessage = fastmsg.FastMessage
+    for i in range(count):
+        m = FastMessage(0, 1, i)
+        del m
+
+def churn_pool(count):
+    pool = fastmsg.MessagePool()
+    acquire = pool.acquire
+    release = pool.release
+    for i in range(count):
+        release(acquire(0, 1, i))
+
+def churn_batches(count, batch=1024):
+    pool = fastmsg.MessagePool(batch)
+    rows = [(0, 1, i) for i in range(batch)]
+    for _ in range(count // batch):
+        pool.release_many(pool.acquire_many(rows))
+
+def bytes_per_message(cls, count=100_000):
+    tracemalloc.start()
+    messages = [cls(0, 1, None, 1_000_000 + i) for i in range(count)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return (size - sys.getsizeof(messages)) / count
+
+def main(count=1_000_000):
+    print(f'{"":<28} {"messages/s":>12} {"bytes/message":>14}')
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        t = timed(churn_message, count)
+        size = bytes_per_message(message.Message)
+    print(f'{"Message":<28} {count / t:>12,.0f} {size:>14.1f}')
+    size = bytes_per_message(fastmsg.FastMessage)
+    print(f'{"FastMessage":<28} {count / timed(churn_fast, count):>12,.0f} {size:>14.1f}')
+    print(f'{"MessagePool acquire/release":<28} {count / timed(churn_pool, count):>12,.0f}')
+    print(f'{"MessagePool batches of 1024":<28} {count / timed(churn_batches, count):>12,.0f}')
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,292 @@
+# codec.py
+#
+# Schema-driven binary encoding of messages.
+#
+# pickle will encode anything, but the output is large and slow to
+# produce.  It is also Python-only, and unpickling data from the
+# network can run arbitrary code.  A Codec instead knows the exact
+# layout of every message type it handles.  Each payload type is
+# registered once with a type id and a list of (name, kind) fields:
+#
+#    >>> codec = Codec(Message)
+#    >>> codec.register(ChatMessage, 1, [('player_id', 'i64'), ('text', 'str')])
+#    >>> codec.register(PlayerUpdate, 2, [('player_id', 'i64'), ('x', 'f64'), ('y', 'f64')])
+#    >>> raw = codec.encode(Message(0, 1, PlayerUpdate(7, 1.5, -2.0)))
+#    >>> len(raw)
+#    50
+#    >>> codec.decode(raw)
+#    Message<...: source=0, dest=1>
+#
+# The schema is compiled into a single struct.Struct.  It holds a type
+# id, the message envelope (source, dest, sequence), every fixed-size
+# field, and a length for each string or bytes field.  The contents of
+# the strings follow the struct.  Encoding a message is one pack() call
+# plus the string data.  Decoding is one unpack_from() call plus a
+# slice for each string.  Like the compiled programs in stackcompile.py,
+# each schema gets its own generated encode and decode functions.  They
+# access the fields by name, so there are no loops over the fields.
+#
+# Field kinds are the fixed-size integers i8, u8, i16, u16, i32, u32,
+# i64 and u64, the floats f32 and f64, bool, and the variable-size
+# str (UTF-8) and bytes.  Decoded values have the declared type.  f64
+# floats and integers that fit come back exactly; f32 loses precision.
+#
+# For high message rates, encode_many() puts a whole batch into one
+# bytearray, and decode_many() reads the batch back through a
+# memoryview without copying each message out first.  The messages
+# simply follow one another.  Each message's struct holds its string
+# lengths, so no extra framing is needed:
+#
+#    >>> buffer = codec.encode_many(messages)
+#    >>> codec.decode_many(buffer) == messages
+#    True
+#
+# Decoding never builds anything but the registered types.  An
+# unknown type id, a truncated message or extra bytes raise
+# ValueError.  All numbers are little-endian.
+
+import keyword
+import struct
+
+KINDS = {
+    'i8': 'b', 'u8': 'B',
+    'i16': 'h', 'u16': 'H',
+    'i32': 'i', 'u32': 'I',
+    'i64': 'q', 'u64': 'Q',
+    'f32': 'f', 'f64': 'd',
+    'bool': '?',
+}
+
+VARIABLE_KINDS = {'str', 'bytes'}
+
+# Message type id, followed by source, dest and sequence
+ENVELOPE = '<Hqqq'
+TYPE_ID = struct.Struct('<H')
+
+class Schema:
+    def __init__(self, cls, type_id, fields, message_cls):
+        self.cls = cls
+        self.type_id = type_id
+        self.fields = list(fields)
+        fmt = ENVELOPE
+        for name, kind in self.fields:
+            if not name.isidentifier() or keyword.iskeyword(name):
+                raise ValueError(f'Bad field name {name!r}')
+            if kind in VARIABLE_KINDS:
+                fmt += 'I'              # Length, the data goes after the struct
+            elif kind in KINDS:
+                fmt += KINDS[kind]
+            else:
+                raise ValueError(f'Unknown field kind {kind!r} for {name!r}')
+        self.struct = struct.Struct(fmt)
+        self.source = _schema_source(self)
+        namespace = {
+            '_pack': self.struct.pack,
+            '_unpack_from': self.struct.unpack_from,
+            '_cls': cls,
+            '_message': message_cls,
+        }
+        exec(compile(self.source, f'<codec {cls.__name__}>', 'exec'), namespace)
+        self.encode = namespace['encode']
+        self.unpack_from = namespace['unpack_from']
+
+def _schema_source(schema):
+    # Straight-line encode() and unpack_from() functions for one
+    # schema.  For ChatMessage(player_id: i64, text: str), encode() is
+    #
+    #    def encode(msg):
+    #        payload = msg.payload
+    #        d1 = payload.text.encode('utf-8')
+    #        return _pack(1, msg.source, msg.dest, msg.sequence, payload.player_id, len(d1)) + d1
+    #
+    # unpack_from() returns the message at buffer[offset] and the offset
+    # just past it.
+    size = schema.struct.size
+    data = []                   # Encoded str/bytes fields
+    args = ['msg.source', 'msg.dest', 'msg.sequence']
+    prepare = []
+    for n, (name, kind) in enumerate(schema.fields):
+        if kind in VARIABLE_KINDS:
+            if kind == 'str':
+                prepare.append(f"d{n} = payload.{name}.encode('utf-8')")
+            else:
+                prepare.append(f'd{n} = bytes(payload.{name})')
+            data.append(f'd{n}')
+            args.append(f'len(d{n})')
+        else:
+            args.append(f'payload.{name}')
+    args = ', '.join([repr(schema.type_id)] + args)
+    lines = ['def encode(msg):', '    payload = msg.payload']
+    lines += [f'    {line}' for line in prepare]
+    lines.append(f'    return _pack({args})' + ''.join(f' + {d}' for d in data))
+
+    names = ', '.join(['_', 'source', 'dest', 'sequence'] +
+                      [f'f{n}' for n in range(len(schema.fields))])
+    lines += ['', 'def unpack_from(buffer, offset):',
+              f'    {names} = _unpack_from(buffer, offset)',
+              f'    offset += {size}']
+    for n, (name, kind) in enumerate(schema.fields):
+        if kind in VARIABLE_KINDS:
+            convert = 'str' if kind == 'str' else 'bytes'
+            encoding = ", 'utf-8'" if kind == 'str' else ''
+            lines += [f'    end = offset + f{n}',
+                      '    if end > len(buffer):',
+                      f'        raise ValueError({f"Truncated {schema.cls.__name__} message"!r})',
+                      f'    f{n} = {convert}(buffer[offset:end]{encoding})',
+                      '    offset = end']
+    fields = ', '.join(f'f{n}' for n in range(len(schema.fields)))
+    lines.append(f'    return _message(source, dest, _cls({fields}), sequence), offset')
+    return ''.join(f'{line}\n' for line in lines)
+
+class Codec:
+    def __init__(self, message_cls):
+        self.message_cls = message_cls
+        self._by_class = {}
+        self._by_id = {}
+
+    def register(self, cls, type_id, fields):
+        # cls(*values) must rebuild a payload from the field values in
+        # the order given, as it does for a NamedTuple
+        if type_id in self._by_id:
+            raise ValueError(f'Type id {type_id} is already used by {self._by_id[type_id].cls.__name__}')
+        schema = Schema(cls, type_id, fields, self.message_cls)
+        self._by_class[cls] = self._by_id[type_id] = schema
+        return schema
+
+    def schema_for(self, msg):
+        try:
+            return self._by_class[type(msg.payload)]
+        except KeyError:
+            raise TypeError(f'No schema registered for {type(msg.payload).__name__}') from None
+
+    def encode(self, msg):
+        return self.schema_for(msg).encode(msg)
+
+    def decode(self, raw):
+        try:
+            msg, end = self._schema_at(raw, 0).unpack_from(raw, 0)
+        except struct.error:
+            raise ValueError('Truncated message') from None
+        if end != len(raw):
+            raise ValueError(f'{len(raw) - end} extra bytes after message')
+        return msg
+
+    def _schema_at(self, buffer, offset):
+        type_id, = TYPE_ID.unpack_from(buffer, offset)
+        schema = self._by_id.get(type_id)
+        if schema is None:
+            raise ValueError(f'Unknown message type id {type_id}')
+        return schema
+
+    def encode_many(self, messages):
+        # Encode a batch of messages into one bytearray.  join() adds up
+        # the sizes first and copies everything into a single buffer of
+        # exactly the right size.  (Packing each message into the buffer
+        # with pack_into() sounds better, but pack_into() is slower than
+        # pack() and the strings then need a slice assignment as well.)
+        lookup = self._by_class.get
+        return bytearray().join([(lookup(type(msg.payload)) or self.schema_for(msg)).encode(msg)
+                                 for msg in messages])
+
+    def decode_many(self, buffer):
+        # Decode everything encode_many() put in buffer.  Messages are
+        # decoded in place through a memoryview, without slicing the
+        # buffer into separate bytes objects.
+        messages = []
+        append = messages.append
+        lookup = self._by_id.get
+        with memoryview(buffer) as view:
+            offset = 0
+            end = len(view)
+            try:
+                while offset < end:
+                    schema = lookup(view[offset] | view[offset + 1] << 8) or self._schema_at(view, offset)
+                    msg, offset = schema.unpack_from(view, offset)
+                    append(msg)
+            except (struct.error, IndexError):
+                raise ValueError('Truncated message') from None
+        return messages
+
+def test_codec():
+    from typing import NamedTuple
+    from fastmsg import FastMessage
+
+    class Chat(NamedTuple):
+        player_id: int
+        text: str
+
+    class Update(NamedTuple):
+        player_id: int
+        x: float
+        y: float
+
+    class Blob(NamedTuple):
+        data: bytes
+
+    codec = Codec(FastMessage)
+    codec.register(Chat, 1, [('player_id', 'i64'), ('text', 'str')])
+    codec.register(Update, 2, [('player_id', 'i32'), ('x', 'f64'), ('y', 'f64')])
+    codec.register(Blob, 3, [('data', 'bytes')])
+
+    messages = [
+        FastMessage(0, 1, Chat(123, 'Test Message')),
+        FastMessage(-5, 2**40, Chat(-1, 'Ünïcödé ✓'), 2**62),
+        FastMessage(3, 4, Chat(2, '')),
+        FastMessage(3, 4, Update(7, 1.5, -2.0)),
+        FastMessage(3, 4, Update(7, 0.1, float('inf'))),
+        FastMessage(3, 4, Blob(b'\x00\xff' * 100)),
+    ]
+    for msg in messages:
+        raw = codec.encode(msg)
+        assert isinstance(raw, bytes)
+        assert codec.decode(raw) == msg
+        assert codec.decode(memoryview(raw)) == msg
+    assert len(codec.encode(messages[3])) == 2 + 3 * 8 + 4 + 2 * 8
+
+    try:
+        codec.register(Blob, 1, [('data', 'bytes')])
+        assert False, "Expected ValueError"
+    except ValueError:
+        pass
+    for name in ('class', 'not a name'):
+        try:
+            codec.register(Blob, 4, [(name, 'i32')])
+            assert False, "Expected ValueError"
+        except ValueError:
+            pass
+    try:
+        codec.encode(FastMessage(0, 1, 'not registered'))
+        assert False, "Expected TypeError"
+    except TypeError:
+        pass
+    # Batches
+    buffer = codec.encode_many(messages)
+    assert isinstance(buffer, bytearray)
+    assert buffer == b''.join(codec.encode(msg) for msg in messages)
+    assert codec.decode_many(buffer) == messages
+    assert codec.decode_many(bytes(buffer)) == messages
+    assert codec.encode_many([]) == bytearray() and codec.decode_many(b'') == []
+    buffer.append(0)                    # Not exported any more, so it can grow
+    for bad in (buffer, buffer[:-2]):
+        try:
+            codec.decode_many(bad)
+            assert False, "Expected ValueError"
+        except ValueError:
+            pass
+    try:
+        codec.encode_many([messages[0], FastMessage(0, 1, None)])
+        assert False, "Expected TypeError"
+    except TypeError:
+        pass
+
+    raw = codec.encode(messages[0])
+    for bad in (raw[:-1], raw + b'x', raw[:10], b'', b'\xff\xff' + raw[2:]):
+        try:
+            codec.decode(bad)
+            assert False, "Expected ValueError"
+        except ValueError:
+            pass
+    print('Good codec')
+
+if __name__ == '__main__':
+    test_codec()
@@ -0,0 +1,139 @@
+# fastmsg.py
+#
+# A message class for programs that really do create billions of them.
+#
+# Message in message.py is fine for experiments, but every instance
+# carries a __dict__, every destruction runs a __del__() method, and
+# the "Message._sequence += 1" counter can hand out the same number
+# twice if two threads create messages at the same time.
+#
+# FastMessage has the same attributes, but:
+#
+#   - It uses __slots__, so there's no per-instance dict.
+#   - It has no finalizer.  Reference counting frees it immediately
+#     and there's no method call on the way out.
+#   - Sequence numbers come from itertools.count().  next() on a count
+#     is a single C call, so threads can't get the same number.
+#
+# For messages that only live for a moment (decoded, dispatched,
+# dropped), a MessagePool keeps a free list of released messages and
+# reuses them instead of allocating new ones:
+#
+#    >>> pool = MessagePool()
+#    >>> m = pool.acquire(0, 1, 'Hey')
+#    >>> m
+#    FastMessage<0: source=0, dest=1>
+#    >>> pool.release(m)                 # Don't use m after this
+#    >>> pool.acquire(2, 3) is m
+#    True
+#
+# acquire_many() creates a whole batch of messages in one call.
+
+import itertools
+
+_sequence = itertools.count()
+
+class FastMessage:
+    __slots__ = ('source', 'dest', 'payload', 'sequence')
+
+    def __init__(self, source, dest, payload=None, sequence=None):
+        self.source = source
+        self.dest = dest
+        self.payload = payload
+        self.sequence = next(_sequence) if sequence is None else sequence
+
+    def __repr__(self):
+        return f'FastMessage<{self.sequence}: source={self.source}, dest={self.dest}>'
+
+    def __eq__(self, other):
+        if not isinstance(other, FastMessage):
+            return NotImplemented
+        return ((self.source, self.dest, self.payload, self.sequence) ==
+                (other.source, other.dest, other.payload, other.sequence))
+
+    __hash__ = None
+
+class MessagePool:
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self._free = []
+
+    def __len__(self):
+        return len(self._free)
+
+    def acquire(self, source, dest, payload=None, sequence=None):
+        try:
+            msg = self._free.pop()
+        except IndexError:
+            msg = FastMessage.__new__(FastMessage)
+        msg.source = source
+        msg.dest = dest
+        msg.payload = payload
+        msg.sequence = next(_sequence) if sequence is None else sequence
+        return msg
+
+    def acquire_many(self, rows):
+        # Messages for an iterable of (source, dest, payload) tuples
+        free = self._free
+        new = FastMessage.__new__
+        messages = []
+        append = messages.append
+        for (source, dest, payload), sequence in zip(rows, _sequence):
+            msg = free.pop() if free else new(FastMessage)
+            msg.source = source
+            msg.dest = dest
+            msg.payload = payload
+            msg.sequence = sequence
+            append(msg)
+        return messages
+
+    def release(self, msg):
+        # Return a message to the pool.  The payload is dropped right
+        # away so that it isn't kept alive by the free list.
+        if len(self._free) < self.maxsize:
+            msg.payload = None
+            self._free.append(msg)
+
+    def release_many(self, messages):
+        for msg in messages:
+            self.release(msg)
+
+def test_fast_message():
+    import sys
+    import threading
+
+    m = FastMessage(0, 1, 'Hey')
+    assert (m.source, m.dest, m.payload) == (0, 1, 'Hey')
+    assert FastMessage(0, 1, 'Hey', 1234).sequence == 1234
+    assert FastMessage(0, 1).sequence > m.sequence
+    assert not hasattr(m, '__dict__')
+    assert FastMessage(0, 1, 'x', 5) == FastMessage(0, 1, 'x', 5)
+    assert sys.getrefcount(m) == 2        # No hidden references
+
+    pool = MessagePool(maxsize=2)
+    a = pool.acquire(0, 1, 'a')
+    b = pool.acquire(0, 1, 'b')
+    c = pool.acquire(0, 1, 'c')
+    pool.release_many([a, b, c])
+    assert len(pool) == 2 and a.payload is None
+    assert pool.acquire(5, 6) is b
+    batch = pool.acquire_many([(1, 2, 'x'), (3, 4, 'y')])
+    assert batch[0] is a and batch[1] is not c
+    assert batch[1].sequence == batch[0].sequence + 1
+    assert [(m.source, m.dest, m.payload) for m in batch] == [(1, 2, 'x'), (3, 4, 'y')]
+
+    # Sequence numbers are unique across threads
+    seen = []
+    def worker():
+        pool = MessagePool()
+        seen.extend(pool.acquire(0, 1).sequence for _ in range(10000))
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(set(seen)) == len(seen) == 80000
+    print('Good fast messages')
+
+if __name__ == '__main__':
+    test_fast_message()
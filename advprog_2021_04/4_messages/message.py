@@ -43,18 +43,29 @@
 class Message:
     _sequence = 0
 
-    def __init__(self, source, dest, payload, sequence=None):
+    def __init__(self, source, dest, payload=None, sequence=None):
         self.source = source
         self.dest = dest
         self.payload = payload
         if sequence is None:
-            self.sequence = Message._sequence
+            sequence = Message._sequence
             Message._sequence += 1
         self.sequence = sequence
 
     def __repr__(self):
         return f'Message<{self.sequence}: source={self.source}, dest={self.dest}>'
 
+    def __eq__(self, other):
+        if not isinstance(other, Message):
+            return NotImplemented
+        return ((self.source, self.dest, self.payload, self.sequence) ==
+                (other.source, other.dest, other.payload, other.sequence))
+
+    def __hash__(self):
+        # Equal messages have the same sequence number.  Hashing only
+        # that keeps messages with unhashable payloads hashable.
+        return hash(self.sequence)
+
     def __del__(self):
         print(f'Message {self.sequence} destroyed')
 
@@ -115,8 +126,8 @@ def test_construction():
     assert m.sequence == 1234
     assert Message._sequence == orig_sequence   # Unchanged
 
-# Uncomment
-test_construction()
+if __name__ == '__main__':
+    test_construction()
 
 # -----------------------------------------------------------------------------
 # Exercise 3 - The Game
@@ -143,8 +154,30 @@ test_construction()
 #
 # You're the system designer:  Define Python classes for the above messages.
 # And show how a message instance of each type would be created.
+#
+# Composition.  Message is the envelope (who it's from, where it goes,
+# and its sequence number) and the game message is the payload:
+#
+#    >>> m = Message(0, 1, ChatMessage(123, 'Hello'))
+#    >>> m.payload.text
+#    'Hello'
+#    >>> m = Message(0, 1, PlayerUpdate(123, 2.5, -1.0))
+#
+# Dispatchers only ever look at the envelope, so adding a new kind of
+# game message doesn't affect them at all.
 # -----------------------------------------------------------------------------
 
+from typing import NamedTuple
+
+class ChatMessage(NamedTuple):
+    player_id: int
+    text: str
+
+class PlayerUpdate(NamedTuple):
+    player_id: int
+    x: float
+    y: float
+
 # -----------------------------------------------------------------------------
 # Exercise 4 - Message on a Wire
 #
@@ -177,24 +210,40 @@ test_construction()
 # Then switch over to using JSON encoding Python's json module.  Keep
 # in mind this is more of a design problem--we want to be able to
 # deal with different encodings, message types, etc.
+#
+# The encoding used here is the binary one in codec.py.  Every game
+# message type is registered with a type id and the types of its
+# fields.  Adding a message type means adding one register() call.
+# A new encoding would be another object with the same encode() and
+# decode() methods.
 # -----------------------------------------------------------------------------
 
+import codec
 
-import pickle
+CODEC = codec.Codec(Message)
+CODEC.register(ChatMessage, 1, [('player_id', 'i64'), ('text', 'str')])
+CODEC.register(PlayerUpdate, 2, [('player_id', 'i64'), ('x', 'f64'), ('y', 'f64')])
 
 def encode(message):
-    raw = pickle.dumps(message)
+    raw = CODEC.encode(message)
     return raw
 
 def decode(raw_message):
-    msg = pickle.loads(raw_message)
+    msg = CODEC.decode(raw_message)
     return msg
 
+# Encoding and decoding a whole batch at once.  encode_many() returns one
+# bytearray holding every message, and decode_many() returns a list.
+def encode_many(messages):
+    return CODEC.encode_many(messages)
+
+def decode_many(buffer):
+    return CODEC.decode_many(buffer)
 
 
 # The following "test" illustrates the basic requirements of encoding/decoding
 def test_serial():
-    m1 = Message(0, 1, 123, "Test Message")  # This might vary depending on (2) above
+    m1 = Message(0, 1, ChatMessage(123, "Test Message"))
     print(f'this is the original message: {m1}')
     # You need to figure out the "encode" operation.  It can look different
     # than what's shown, but the final result must be bytes.
@@ -220,8 +269,15 @@ def test_serial():
     print(f'm2: {m2}')
     assert m1 == m2
 
-# Uncomment
-test_serial()
+    # Messages can still be put in sets and used as dict keys
+    assert len({m1, m2, Message(0, 1, [])}) == 2
+
+    # Batches work the same way
+    batch = [m1, Message(1, 0, PlayerUpdate(123, 2.5, -1.0))]
+    assert decode_many(encode_many(batch)) == batch
+
+if __name__ == '__main__':
+    test_serial()
 
 # -----------------------------------------------------------------------------
 # Exercise 5 - There can be only one
@@ -292,18 +348,104 @@ def test_send():
 # receive all of the messages.  Here's an example of a Dispatcher that
 # implements this general idea.
 
-from collections import defaultdict
+# This version keeps a routing table: for every address, a tuple of
+# the receive_message() methods to call.  send() is a single dict
+# lookup followed by a loop over the tuple.  Unknown addresses aren't
+# added to the table.  The tuples are never modified.  Subscribing or
+# unsubscribing builds a new tuple for that address, so a handler
+# that unsubscribes while a message is being delivered doesn't upset
+# the loop in send().  Handlers get messages in the order they
+# subscribed.
+
+import weakref
+
+def _weak_receiver(handler, callback):
+    # receive_message() for a watched handler, without keeping the
+    # handler alive.  callback is called when the handler goes away.
+    method = weakref.WeakMethod(handler.receive_message, callback)
+    def receive_message(msg):
+        receive = method()
+        if receive is not None:
+            receive(msg)
+    return receive_message, method
 
 class PubSubDispatcher:
     def __init__(self):
-        self.subscribers = defaultdict(set)
+        self.subscribers = {}       # addr -> ((handler or weakref, receiver), ...)
+        self.routes = {}            # addr -> (receiver, ...)
+        self._contexts = []
+
+    def _update(self, addr, entries):
+        if entries:
+            self.subscribers[addr] = entries
+            self.routes[addr] = tuple(receiver for _, receiver in entries)
+        else:
+            self.subscribers.pop(addr, None)
+            self.routes.pop(addr, None)
+
+    def _find(self, addr, handler):
+        for n, (entry, _) in enumerate(self.subscribers.get(addr, ())):
+            if entry is handler:
+                return n
+            if isinstance(entry, weakref.WeakMethod):
+                method = entry()
+                if method is not None and method.__self__ is handler:
+                    return n
+        return -1
 
     def subscribe(self, addr, handler):
-        self.subscribers[addr].add(handler)
+        # Returns True if the handler wasn't already subscribed
+        if self._find(addr, handler) >= 0:
+            return False
+        entries = self.subscribers.get(addr, ())
+        self._update(addr, entries + ((handler, handler.receive_message),))
+        return True
+
+    def watch(self, addr, handler):
+        # Like subscribe(), but the handler is unsubscribed automatically
+        # once nothing else refers to it
+        if self._find(addr, handler) < 0:
+            def unwatch(ref):
+                entries = self.subscribers.get(addr, ())
+                self._update(addr, tuple(e for e in entries if e[0] is not ref))
+            receiver, ref = _weak_receiver(handler, unwatch)
+            self._update(addr, self.subscribers.get(addr, ()) + ((ref, receiver),))
+
+    def unsubscribe(self, addr, handler):
+        n = self._find(addr, handler)
+        if n >= 0:
+            entries = self.subscribers[addr]
+            self._update(addr, entries[:n] + entries[n+1:])
+
+    def __enter__(self):
+        context = DispatcherContext(self)
+        self._contexts.append(context)
+        return context
+
+    def __exit__(self, ty, val, tb):
+        context = self._contexts.pop()
+        for addr, handler in context.subscriptions:
+            self.unsubscribe(addr, handler)
 
     def send(self, msg):
-        for handler in self.subscribers[msg.dest]:
-            handler.receive_message(msg)
+        for receive in self.routes.get(msg.dest, ()):
+            receive(msg)
+
+class DispatcherContext:
+    # Returned by "with dispatcher as context".  Handlers subscribed
+    # through it are unsubscribed when the with-block ends.
+    def __init__(self, dispatcher):
+        self.dispatcher = dispatcher
+        self.subscriptions = []
+
+    def subscribe(self, addr, handler):
+        # Only subscriptions made here are undone at the end.  One that
+        # already existed before the with-block is left alone.
+        if self.dispatcher.subscribe(addr, handler):
+            self.subscriptions.append((addr, handler))
+
+    def send(self, msg):
+        self.dispatcher.send(msg)
 
 # An example of of handler that receives messages
 class ExampleHandler:
@@ -328,6 +470,48 @@ def pubsub_example():
 # Uncomment to try it.  Make sure you understand what's happening above.
 # pubsub_example()
 
+def test_routing():
+    dispatcher = PubSubDispatcher()
+    received = []
+    class Recorder:
+        def __init__(self, name):
+            self.name = name
+        def receive_message(self, msg):
+            received.append((self.name, msg.sequence))
+    handlers = [Recorder(n) for n in range(5)]
+    for h in reversed(handlers):
+        dispatcher.subscribe(1, h)
+    dispatcher.subscribe(1, handlers[0])          # Already subscribed
+    dispatcher.send(Message(0, 1, None, 10))
+    assert received == [(n, 10) for n in reversed(range(5))]
+
+    # Unknown addresses don't add anything to the table
+    for dest in range(1000, 2000):
+        dispatcher.send(Message(0, dest, None, 0))
+    assert list(dispatcher.routes) == [1]
+
+    # A handler unsubscribing during delivery doesn't affect this message
+    class Quitter(Recorder):
+        def receive_message(self, msg):
+            super().receive_message(msg)
+            dispatcher.unsubscribe(1, self)
+    dispatcher.subscribe(1, Quitter('q'))
+    dispatcher.subscribe(1, Recorder('last'))
+    received.clear()
+    dispatcher.send(Message(0, 1, None, 11))
+    dispatcher.send(Message(0, 1, None, 12))
+    assert [name for name, _ in received] == [4, 3, 2, 1, 0, 'q', 'last', 4, 3, 2, 1, 0, 'last']
+
+    for h in handlers:
+        dispatcher.unsubscribe(1, h)
+    dispatcher.unsubscribe(1, handlers[0])        # Not subscribed any more
+    dispatcher.unsubscribe(99, handlers[0])
+    assert len(dispatcher.routes[1]) == 1
+    print('Good routing')
+
+if __name__ == '__main__':
+    test_routing()
+
 # THE DEBATE:
 # ===========
 #
@@ -406,7 +590,8 @@ def test_option1():
     dispatcher.send(Message(0, 1))    # Handler should not receive this
     print("Good unsubscribe")
 
-# test_option1()            # Uncomment
+if __name__ == '__main__':
+    test_option1()
 
 # Option 2:
 def test_option2():
@@ -418,7 +603,8 @@ def test_option2():
     dispatcher.send(Message(0, 1))    # Handler should not receive
     print("Good watching")
 
-# test_option2()           # Uncomment
+if __name__ == '__main__':
+    test_option2()
 
 # Option 3:
 def test_option3():
@@ -431,8 +617,52 @@ def test_option3():
     dispatcher.send(Message(0, 1))    # Handler should not receive
     print("Good context manager")
 
-# test_option3()          # Uncomment
+if __name__ == '__main__':
+    test_option3()
 
     
         
     
+
+def test_subscriptions():
+    class Counter:
+        def __init__(self):
+            self.count = 0
+        def receive_message(self, msg):
+            self.count += 1
+
+    # A context only undoes the subscriptions made through it
+    dispatcher = PubSubDispatcher()
+    h1, h2, h3 = Counter(), Counter(), Counter()
+    dispatcher.subscribe(1, h1)
+    with dispatcher as context:
+        context.subscribe(1, h1)                  # Already subscribed
+        context.subscribe(1, h3)
+        dispatcher.subscribe(2, h2)               # Not through the context
+        with dispatcher as inner:
+            inner.subscribe(3, h3)
+        assert 3 not in dispatcher.routes
+        dispatcher.send(Message(0, 1, None, 0))
+    assert h1.count == 1 and h3.count == 1
+    assert set(dispatcher.routes) == {1, 2}
+    assert len(dispatcher.routes[1]) == 1
+    dispatcher.send(Message(0, 1, None, 0))
+    dispatcher.send(Message(0, 2, None, 0))
+    assert (h1.count, h2.count, h3.count) == (2, 1, 1)
+
+    # Watched handlers go away with the handler.  Unsubscribing one
+    # works too.
+    h4, h5 = Counter(), Counter()
+    dispatcher.watch(4, h4)
+    dispatcher.watch(4, h5)
+    dispatcher.watch(4, h5)                       # Already watched
+    dispatcher.send(Message(0, 4, None, 0))
+    assert h4.count == h5.count == 1
+    del h4
+    assert len(dispatcher.routes[4]) == 1
+    dispatcher.unsubscribe(4, h5)
+    assert 4 not in dispatcher.routes
+    print("Good subscriptions")
+
+if __name__ == '__main__':
+    test_subscriptions()